@@ -0,0 +1,341 @@
+"""Result cache for the /api/analytics endpoints.
+
+Responses are cached per (endpoint, parameters, caller role) under a
+generation number. Lead and campaign writes call ``invalidate`` with the
+campaigns they touched. That bumps each campaign's generation and the
+global one ("*"). Campaign-scoped requests (a campaign_id parameter) read
+their campaign's generation. Every other request reads the global one. A
+bump changes the key that readers look up, so a cached result is never
+served after a relevant write; old entries simply age out.
+
+Rollup-mode requests read rollup scopes ("rollup:*", "rollup:<campaign>")
+instead, and the campaign overview also reads "campaign_targets". Those
+change only when the aggregators flush: a rollup flush bumps the rollup
+scopes of the campaigns it touched and "rollup:*", a campaign counter
+flush bumps "campaign_targets". Lead writes leave them alone, so flushes
+under write load do not empty the live caches. For a similar reason the "analytics"
+handle reads the primary while caching is enabled: a recompute on a lagging
+secondary would cache pre-write data for the whole TTL. Setting
+ANALYTICS_READ_PREFERENCE explicitly overrides that.
+
+ANALYTICS_CACHE_BACKEND selects where entries and generations live:
+
+    memory   per-process LRU (ANALYTICS_CACHE_MAX_ENTRIES); generations are
+             per process too, so use it with a single worker
+    mongo    shared by every worker: entries in analytics_cache (TTL
+             index), generations in analytics_generations. Bumps are
+             applied in memory and persisted in the background, so a
+             write does not wait for them; other workers see a bump once
+             it is persisted
+    none     caching disabled
+    pkg.module:Class   any AnalyticsCacheBackend subclass
+
+Concurrent misses on one key share a single computation.
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+from collections import Counter
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from importlib import import_module
+from pymongo import UpdateOne
+from app.cache import TTLCache, SingleFlight
+from app.config import settings
+from app.database import get_db
+from app.security import get_current_user_from_header
+import asyncio
+import json
+import uuid
+
+GLOBAL_SCOPE = "*"
+
+# Today's target progress on campaign documents (campaign counter flushes)
+TARGETS_SCOPE = "campaign_targets"
+
+
+def campaign_scopes(campaign_ids: Iterable[Optional[str]]) -> Set[str]:
+    """The given campaigns' scopes plus the global one"""
+    scopes = {str(campaign_id) for campaign_id in campaign_ids if campaign_id}
+    scopes.add(GLOBAL_SCOPE)
+    return scopes
+
+
+def rollup_scope(scope: str) -> str:
+    """Scope of results read from lead_daily_stats instead of leads"""
+    return f"rollup:{scope}"
+
+
+def approximate_size(value: Any) -> int:
+    """Serialized size of a cached response, in bytes"""
+    return len(json.dumps(value, default=str))
+
+
+class AnalyticsCacheBackend(ABC):
+    """Storage for cached responses and generation counters"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        """The cached value, or None on a miss"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: int):
+        ...
+
+    @abstractmethod
+    async def generation(self, scope: str) -> Hashable:
+        """Current generation of scope; only equality matters, it becomes part of the key"""
+
+    @abstractmethod
+    async def bump(self, scopes: Iterable[str]):
+        ...
+
+    async def stats(self) -> Dict:
+        return {}
+
+    async def close(self):
+        """Finish pending work at shutdown"""
+
+
+class MemoryBackend(AnalyticsCacheBackend):
+    """Per-process LRU; entries remember their approximate size"""
+
+    def __init__(self, maxsize: int):
+        self._entries = TTLCache(maxsize=maxsize)
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int):
+        self._entries.set(key, (value, approximate_size(value)), ttl)
+
+    async def generation(self, scope: str) -> int:
+        return self._generations.get(scope, 0)
+
+    async def bump(self, scopes: Iterable[str]):
+        for scope in scopes:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    async def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "maxsize": self._entries.maxsize,
+            "memory_bytes": sum(size for _, size in self._entries.values()),
+            "generations": len(self._generations),
+            "evictions": self._entries.evictions
+        }
+
+
+class MongoBackend(AnalyticsCacheBackend):
+    """Shared by all workers through the database.
+
+    ``bump`` only counts the bump in memory and starts a background $inc,
+    so it costs a write no round trip. Until its bumps of a scope are
+    persisted, this worker reads a generation only it uses (stored value
+    plus a worker-unique suffix), so it never serves an entry computed
+    before its own write. Stored generations only ever grow, so once the
+    $inc lands the plain value is safe for every worker.
+    """
+
+    def __init__(self):
+        self._worker = uuid.uuid4().hex[:8]
+        self._pending: Counter = Counter()
+        self._bumps: Counter = Counter()
+        self._persisting: Optional[asyncio.Task] = None
+        self.persist_failures = 0
+
+    async def get(self, key: str) -> Any:
+        entry = await get_db().analytics_cache.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"value": 1}
+        )
+        return entry["value"] if entry else None
+
+    async def set(self, key: str, value: Any, ttl: int):
+        try:
+            await get_db().analytics_cache.replace_one(
+                {"_id": key},
+                {"value": value, "size": approximate_size(value),
+                 "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl)},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"⚠️ Analytics cache write failed for {key}: {str(e)}")
+
+    async def generation(self, scope: str) -> Hashable:
+        # Checked before the read: bumps persisted after it are not in the value read
+        unpersisted = self._pending[scope] > 0
+        local = self._bumps[scope]
+        doc = await get_db().analytics_generations.find_one({"_id": scope})
+        value = doc["value"] if doc else 0
+        return f"{value}+{self._worker}.{local}" if unpersisted else value
+
+    async def bump(self, scopes: Iterable[str]):
+        for scope in scopes:
+            self._pending[scope] += 1
+            self._bumps[scope] += 1
+        if self._pending and (self._persisting is None or self._persisting.done()):
+            self._persisting = asyncio.create_task(self._persist())
+
+    async def _persist(self):
+        while self._pending:
+            pending = Counter(self._pending)
+            updates = [UpdateOne({"_id": scope}, {"$inc": {"value": count}}, upsert=True)
+                       for scope, count in pending.items()]
+            try:
+                await get_db().analytics_generations.bulk_write(updates, ordered=False)
+            except Exception as e:
+                # Kept pending and retried on the next bump; an $inc applied twice only skips a generation
+                self.persist_failures += 1
+                print(f"⚠️ Analytics generation persist failed: {str(e)}")
+                return
+            self._pending -= pending
+
+    async def stats(self) -> Dict:
+        pipeline = [
+            {"$match": {"expires_at": {"$gt": datetime.now(timezone.utc)}}},
+            {"$group": {"_id": None, "entries": {"$sum": 1}, "bytes": {"$sum": "$size"}}}
+        ]
+        rows = await get_db().analytics_cache.aggregate(pipeline).to_list(length=1)
+        return {
+            "entries": rows[0]["entries"] if rows else 0,
+            "stored_bytes": rows[0]["bytes"] if rows else 0,
+            "unpersisted_bumps": sum(self._pending.values()),
+            "persist_failures": self.persist_failures
+        }
+
+    async def close(self):
+        if self._persisting is not None:
+            await self._persisting
+        if self._pending:
+            await self._persist()
+
+
+def load_backend(name: str) -> Optional[AnalyticsCacheBackend]:
+    if name == "none":
+        return None
+    if name == "memory":
+        return MemoryBackend(settings.ANALYTICS_CACHE_MAX_ENTRIES)
+    if name == "mongo":
+        return MongoBackend()
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown analytics cache backend: {name}")
+    backend_class = getattr(import_module(module_name), class_name)
+    if not (isinstance(backend_class, type) and issubclass(backend_class, AnalyticsCacheBackend)):
+        raise TypeError(f"{name} is not an AnalyticsCacheBackend")
+    return backend_class()
+
+
+class AnalyticsCache:
+    """Generation-keyed response cache with single-flight computation"""
+
+    def __init__(self, backend: Optional[AnalyticsCacheBackend]):
+        self.backend = backend
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    async def invalidate(self, *campaign_ids: Optional[str]):
+        """Bump the generation of every given campaign and the global one.
+
+        Lead and campaign writes await this: a dict update with the memory
+        backend, no round trip with the mongo backend (see MongoBackend).
+        """
+        await self.bump(campaign_scopes(campaign_ids))
+
+    async def bump(self, scopes: Iterable[str]):
+        """Bump the generation of exactly these scopes"""
+        if self.backend is None:
+            return
+        try:
+            await self.backend.bump(scopes)
+            self.invalidations += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ Analytics cache invalidation failed: {str(e)}")
+
+    async def get_or_compute(self, key: Hashable, scopes: Iterable[str], compute: Callable[[], Awaitable[Any]]) -> Any:
+        """The cached result under the current generation of every scope, or compute it"""
+        if self.backend is None:
+            return await compute()
+
+        try:
+            generations = [f"{scope}:{await self.backend.generation(scope)}" for scope in scopes]
+            full_key = f"{','.join(generations)}:{key}"
+            value = await self.backend.get(full_key)
+        except Exception as e:
+            # A broken cache must not take the dashboard down with it
+            self.errors += 1
+            print(f"⚠️ Analytics cache read failed: {str(e)}")
+            return await compute()
+
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+
+        async def compute_and_store():
+            result = await compute()
+            await self.backend.set(full_key, result, settings.ANALYTICS_CACHE_TTL_SECONDS)
+            return result
+
+        return await self._flights.do(full_key, compute_and_store)
+
+    def cached(
+        self,
+        endpoint: str,
+        scope_param: Optional[str] = None,
+        mode_param: Optional[str] = None,
+        extra_scopes: Tuple[str, ...] = ()
+    ):
+        """Decorator for analytics route handlers.
+
+        The key is the endpoint, every query parameter and the caller's role;
+        the handler itself still runs its own permission checks on a miss,
+        and errors (HTTPException included) are never cached. The scope is
+        the scope_param campaign (or global); requests whose mode_param
+        resolves to "rollup" use the rollup scope instead. extra_scopes are
+        other data the handler reads, e.g. TARGETS_SCOPE.
+        """
+        def decorator(handler):
+            @wraps(handler)
+            async def wrapper(**kwargs):
+                current_user = get_current_user_from_header(kwargs.get("authorization"))
+                params = ",".join(f"{name}={kwargs[name]}" for name in sorted(kwargs) if name != "authorization")
+                key = f"{endpoint}|{current_user.get('role')}|{params}"
+                scope = (kwargs.get(scope_param) if scope_param else None) or GLOBAL_SCOPE
+                if mode_param and (kwargs.get(mode_param) or settings.ANALYTICS_READ_MODE) == "rollup":
+                    scope = rollup_scope(scope)
+                return await self.get_or_compute(key, (scope, *extra_scopes), lambda: handler(**kwargs))
+            return wrapper
+        return decorator
+
+    async def close(self):
+        if self.backend is not None:
+            await self.backend.close()
+
+    async def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        try:
+            backend_stats = await self.backend.stats() if self.backend is not None else {}
+        except Exception as e:
+            backend_stats = {"error": str(e)}
+        return {
+            "backend": settings.ANALYTICS_CACHE_BACKEND,
+            "ttl_seconds": settings.ANALYTICS_CACHE_TTL_SECONDS,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "single_flight": self._flights.stats(),
+            **backend_stats
+        }
+
+
+analytics_cache = AnalyticsCache(load_backend(settings.ANALYTICS_CACHE_BACKEND))
@@ -0,0 +1,181 @@
+"""Campaign lead counters (total_leads, qualified_leads, disqualified_leads
+and the per-source counts on the day's daily target) expressed as
+aggregated $inc updates, so many lead transitions cost one update per
+campaign.
+
+Daily targets are matched with the ``$[today]`` filtered positional
+operator, so the update still applies to the campaign totals when there is
+no target for that day.
+
+Request handlers hand their deltas to ``campaign_counters`` (a
+CampaignCounterAggregator), which merges them per (campaign, day) and
+flushes one $inc per pair every CAMPAIGN_COUNTER_FLUSH_MS, so a hot
+campaign document takes a few writes per second instead of one or two per
+lead.
+"""
+from typing import Dict, List, Optional, Tuple, Union
+from collections import Counter
+from datetime import date, datetime, timezone
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.database import get_db
+from app.analytics_cache import analytics_cache, TARGETS_SCOPE
+import asyncio
+import time
+
+STATUS_COUNTERS = {
+    "qualified": "qualified_leads",
+    "disqualified": "disqualified_leads"
+}
+
+# Lead source -> daily target counter suffix
+DAILY_TARGET_SOURCES = {
+    "data_entry": "data",
+    "calling": "calling"
+}
+
+
+def target_day(day: Union[date, datetime, None] = None) -> datetime:
+    """Daily target key: naive midnight UTC, as Mongo returns it (BSON has no date-only type)"""
+    day = day or datetime.now(timezone.utc)
+    return datetime(day.year, day.month, day.day)
+
+
+def new_lead_inc(lead_data: Dict) -> Counter:
+    """Counter deltas for a newly created lead"""
+    inc = Counter({"total_leads": 1})
+    status = lead_data.get("status")
+    if status in STATUS_COUNTERS:
+        inc[STATUS_COUNTERS[status]] += 1
+    return inc
+
+
+def status_change_inc(previous_status: Optional[str], new_status: str, source: Optional[str]) -> Counter:
+    """Counter deltas for one lead moving from previous_status to new_status"""
+    inc = Counter()
+    if previous_status == new_status:
+        return inc
+    if new_status in STATUS_COUNTERS:
+        inc[STATUS_COUNTERS[new_status]] += 1
+        if source in DAILY_TARGET_SOURCES:
+            inc[f"daily_targets.$[today].{new_status}_{DAILY_TARGET_SOURCES[source]}"] += 1
+    if previous_status in STATUS_COUNTERS:
+        inc[STATUS_COUNTERS[previous_status]] -= 1
+    return inc
+
+
+def campaign_inc_updates(deltas: Dict[str, Counter], day: Optional[datetime] = None) -> List[UpdateOne]:
+    """One UpdateOne per campaign with its summed deltas (zero deltas dropped)"""
+    day = day or target_day()
+    updates = []
+    for campaign_id, inc in deltas.items():
+        inc = {field: value for field, value in inc.items() if value}
+        if not inc or not ObjectId.is_valid(campaign_id):
+            continue
+        array_filters = [{"today.date": day}] if any("$[today]" in field for field in inc) else None
+        updates.append(UpdateOne({"_id": ObjectId(campaign_id)}, {"$inc": inc}, array_filters=array_filters))
+    return updates
+
+
+class CampaignCounterAggregator:
+    """Merges campaign counter deltas in memory and flushes them periodically"""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[str, datetime], Counter] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.deltas = 0
+        self.flushes = 0
+        self.updates_sent = 0
+        self.failed_updates = 0
+        self.total_flush_ms = 0.0
+
+    def add(self, campaign_id: Optional[str], inc: Counter, day: Optional[datetime] = None):
+        """Merge deltas for campaign_id (invalid or empty ids are ignored)"""
+        if not campaign_id or not inc:
+            return
+        if not ObjectId.is_valid(campaign_id):
+            print(f"⚠️ Invalid campaign_id {campaign_id!r}, counters not updated")
+            return
+        key = (campaign_id, target_day(day))
+        self._pending.setdefault(key, Counter()).update(inc)
+        self.deltas += 1
+
+    async def flush(self):
+        """Send every pending delta: one $inc per (campaign, day)"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+
+        keys = []
+        updates = []
+        for (campaign_id, day), inc in pending.items():
+            built = campaign_inc_updates({campaign_id: inc}, day)
+            if built:
+                keys.append((campaign_id, day))
+                updates.extend(built)
+        if not updates:
+            return
+
+        started = time.perf_counter()
+        try:
+            await get_db().campaigns.bulk_write(updates, ordered=False)
+        except BulkWriteError as e:
+            # Failed updates were not applied - merge them back for the next flush
+            write_errors = e.details.get("writeErrors", [])
+            for write_error in write_errors:
+                key = keys[write_error["index"]]
+                self._pending.setdefault(key, Counter()).update(pending[key])
+            self.failed_updates += len(write_errors)
+            print(f"⚠️ Campaign counter flush: {len(write_errors)} updates failed, retrying next flush")
+        except Exception as e:
+            # Outcome unknown; retrying could double count
+            self.failed_updates += len(updates)
+            print(f"❌ Campaign counter flush failed, {len(updates)} updates dropped: {str(e)}")
+
+        # Today's target progress in cached campaign analytics is stale now
+        await analytics_cache.bump([TARGETS_SCOPE])
+
+        self.flushes += 1
+        self.updates_sent += len(updates)
+        self.total_flush_ms += (time.perf_counter() - started) * 1000
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), settings.CAMPAIGN_COUNTER_FLUSH_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️ Campaign counter flush failed: {str(e)}")
+
+    def start(self):
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop after a final flush (never cancelled mid-write)"""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "pending_campaigns": len(self._pending),
+            "deltas": self.deltas,
+            "flushes": self.flushes,
+            "updates_sent": self.updates_sent,
+            "failed_updates": self.failed_updates,
+            "deltas_per_update": round(self.deltas / self.updates_sent, 2) if self.updates_sent else 0.0,
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0
+        }
+
+
+campaign_counters = CampaignCounterAggregator()
@@ -7,11 +7,73 @@ class Settings(BaseSettings):
     # Database
     MONGODB_URL: str
     DATABASE_NAME: str = "task_manager"
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGO_COMPRESSORS: str = ""  # e.g. "zstd,snappy,zlib" (zstd needs zstandard, snappy needs python-snappy)
+    
+    # Named database handles (see app.database.get_db)
+    # Unset: "primary" while ANALYTICS_CACHE_BACKEND caches results, else "secondaryPreferred"
+    ANALYTICS_READ_PREFERENCE: Optional[str] = None
+    AUDIT_WRITE_CONCERN_W: int = 1  # 0 = unacknowledged
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    ACCESS_TOKEN_MAX_EXPIRE_MINUTES: Optional[int] = None  # cap on create_access_token(expires_delta=...); unset = ACCESS_TOKEN_EXPIRE_MINUTES
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    REVOCATION_REFRESH_SECONDS: int = 5
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    
+    # User directory cache (name/email enrichment)
+    USER_DIRECTORY_CACHE_SIZE: int = 5000
+    USER_DIRECTORY_TTL_SECONDS: int = 300
+    
+    # Lead imports
+    LEAD_IMPORT_CHUNK_SIZE: int = 1000
+    LEAD_IMPORT_UPLOAD_DIR: Optional[str] = None  # defaults to the system temp dir
+    LEAD_IMPORT_MAX_ERRORS: int = 100  # row errors kept on an import job
+    
+    # Duplicate lead detection
+    LEAD_DUPLICATE_POLICY: str = "disqualify"  # "report" or "disqualify"
+    LEAD_DEFAULT_COUNTRY_CODE: str = "91"  # prefixed to national phone numbers
+    
+    # Lead creation side effects: "sequential", "concurrent" or "transaction"
+    LEAD_WRITE_MODE: str = "concurrent"
+    
+    # Write-behind queue (audit events, off-critical-path updates)
+    WRITE_BEHIND_FLUSH_MS: int = 50
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    WRITE_BEHIND_MAX_QUEUE: int = 10000
+    WRITE_BEHIND_DURABILITY: str = "fire_and_forget"  # or "await_flush"
+    
+    # Lead scoring: pending rescores are batched over this interval
+    LEAD_SCORE_DEBOUNCE_MS: int = 1000
+    
+    # Campaign counter deltas are merged in memory and flushed at this interval
+    CAMPAIGN_COUNTER_FLUSH_MS: int = 250
+    
+    # Lead analytics: date ranges and trend buckets are computed in this timezone
+    ANALYTICS_TIMEZONE: str = "UTC"  # IANA name, e.g. "Asia/Kolkata"
+    ANALYTICS_TREND_GRANULARITY: str = "day"  # "day", "week" or "month"
+    ANALYTICS_READ_MODE: str = "live"  # "live" (leads) or "rollup" (lead_daily_stats)
+    LEAD_DAILY_STATS_FLUSH_MS: int = 500
+    
+    # Analytics response cache (see app.analytics_cache)
+    ANALYTICS_CACHE_BACKEND: str = "memory"  # "memory", "mongo", "none" or "package.module:Class"
+    ANALYTICS_CACHE_TTL_SECONDS: int = 300
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 1000
+    
+    # Query monitoring
+    SLOW_QUERY_MS: int = 100
+    SLOW_QUERY_EXPLAIN: bool = True
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 4
     
     # CORS - Changed to string to avoid JSON parsing
     CORS_ORIGINS: str = "http://localhost:3000"
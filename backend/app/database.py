@@ -1,25 +1,83 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ReadPreference, WriteConcern
 from app.config import settings
-from typing import Optional
+from app.indexes import ensure_indexes
+from app.monitoring import command_listener, pool_listener
+from typing import Optional, Dict
 import asyncio
 
 # Global database client
 client: Optional[AsyncIOMotorClient] = None
 db: Optional[AsyncIOMotorDatabase] = None
 
-async def connect_to_mongo():
+# Named handles on the same client with their own read preference / write concern:
+#   default   - primary reads, default write concern (hot CRUD)
+#   analytics - aggregations and exports, may read from secondaries
+#   audit     - activity/audit inserts that tolerate a weaker write concern
+handles: Dict[str, AsyncIOMotorDatabase] = {}
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST
+}
+
+def client_options() -> Dict:
+    """Connection pool and compression options from Settings"""
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE
+    }
+    if settings.MONGO_MAX_IDLE_TIME_MS is not None:
+        options["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+    if settings.MONGO_WAIT_QUEUE_TIMEOUT_MS is not None:
+        options["waitQueueTimeoutMS"] = settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    return options
+
+def analytics_read_preference() -> str:
+    """ANALYTICS_READ_PREFERENCE, or its default for the analytics cache setting.
+
+    A cached result is stored under the current generation for the whole
+    TTL, so computing it on a lagging secondary would keep serving data from
+    before the write that bumped the generation: cached analytics read the
+    primary unless configured otherwise.
+    """
+    if settings.ANALYTICS_READ_PREFERENCE:
+        return settings.ANALYTICS_READ_PREFERENCE
+    return "secondaryPreferred" if settings.ANALYTICS_CACHE_BACKEND == "none" else "primary"
+
+async def connect_to_mongo(with_indexes: bool = True):
     """Connect to MongoDB"""
     global client, db
     try:
-        client = AsyncIOMotorClient(settings.MONGODB_URL)
+        command_listener.bind_loop(asyncio.get_running_loop())
+        client = AsyncIOMotorClient(
+            settings.MONGODB_URL,
+            event_listeners=[command_listener, pool_listener],
+            **client_options()
+        )
         db = client[settings.DATABASE_NAME]
+        handles["default"] = db
+        handles["analytics"] = client.get_database(
+            settings.DATABASE_NAME,
+            read_preference=READ_PREFERENCES[analytics_read_preference()]
+        )
+        handles["audit"] = client.get_database(
+            settings.DATABASE_NAME,
+            write_concern=WriteConcern(w=settings.AUDIT_WRITE_CONCERN_W)
+        )
         
         # Test connection
         await client.admin.command('ping')
         print(f"✅ Successfully connected to MongoDB: {settings.DATABASE_NAME}")
         
         # Create indexes
-        await create_indexes()
+        if with_indexes:
+            await create_indexes()
         
     except Exception as e:
         print(f"❌ Failed to connect to MongoDB: {str(e)}")
@@ -35,45 +93,20 @@ async def close_mongo_connection():
 async def create_indexes():
     """Create database indexes for performance optimization"""
     try:
-        # Users collection indexes
-        await db.users.create_index("email", unique=True)
-        await db.users.create_index("username", unique=True)
-        await db.users.create_index("role")
-        await db.users.create_index("is_active")
-        await db.users.create_index([("created_at", -1)])
-        
-        # Tasks collection indexes
-        await db.tasks.create_index("created_by")
-        await db.tasks.create_index("assigned_to")
-        await db.tasks.create_index("status")
-        await db.tasks.create_index("priority")
-        await db.tasks.create_index("due_date")
-        await db.tasks.create_index([("status", 1), ("due_date", 1)])
-        await db.tasks.create_index([("assigned_to", 1), ("status", 1)])
-        await db.tasks.create_index([("created_by", 1), ("created_at", -1)])
-        
-        # Comments collection indexes
-        await db.comments.create_index("task_id")
-        await db.comments.create_index("created_by")
-        await db.comments.create_index([("task_id", 1), ("created_at", -1)])
-        
-        # Notifications collection indexes
-        await db.notifications.create_index("user_id")
-        await db.notifications.create_index([("user_id", 1), ("is_read", 1)])
-        await db.notifications.create_index([("user_id", 1), ("created_at", -1)])
-        
-        # Activity logs collection indexes
-        await db.activity_logs.create_index("user_id")
-        await db.activity_logs.create_index("entity_type")
-        await db.activity_logs.create_index([("user_id", 1), ("created_at", -1)])
+        results = await ensure_indexes(db)
+        failed = {name: result for name, result in results.items() if result != "ok"}
         
-        print("✅ Database indexes created successfully")
+        if failed:
+            for name, result in failed.items():
+                print(f"⚠️ Error creating indexes on {name}: {result}")
+        else:
+            print("✅ Database indexes created successfully")
         
     except Exception as e:
         print(f"⚠️ Error creating indexes: {str(e)}")
 
-def get_db() -> AsyncIOMotorDatabase:
-    """Get database instance"""
+def get_db(profile: str = "default") -> AsyncIOMotorDatabase:
+    """Get database instance (optionally a named handle: "analytics", "audit")"""
     if db is None:
         raise RuntimeError("Database not initialized. Call connect_to_mongo first.")
-    return db
+    return handles[profile]
@@ -0,0 +1,147 @@
+"""Declarative index specification for every collection.
+
+Run ``python -m app.indexes`` from the backend directory to print the drift
+report, or ``python -m app.indexes --create`` to build missing indexes first.
+"""
+from typing import Dict, List
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import asyncio
+
+# Most lead/campaign reads filter on is_deleted: False, so those indexes
+# only cover live documents. Lead listings sort on (created_at, _id), or
+# (score, created_at, _id), for keyset pagination (app.pagination).
+LIVE = {"partialFilterExpression": {"is_deleted": False}}
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel("email", unique=True),
+        IndexModel("username", unique=True),
+        IndexModel("role"),
+        IndexModel("is_active"),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    "tasks": [
+        IndexModel("created_by"),
+        IndexModel("assigned_to"),
+        IndexModel("status"),
+        IndexModel("priority"),
+        IndexModel("due_date"),
+        IndexModel([("status", ASCENDING), ("due_date", ASCENDING)]),
+        IndexModel([("assigned_to", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("created_by", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "comments": [
+        IndexModel("task_id"),
+        IndexModel("created_by"),
+        IndexModel([("task_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "notifications": [
+        IndexModel("user_id"),
+        IndexModel([("user_id", ASCENDING), ("is_read", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "activity_logs": [
+        IndexModel("user_id"),
+        IndexModel("entity_type"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "revoked_tokens": [
+        IndexModel("expires_at", expireAfterSeconds=0),
+        IndexModel("revoked_at"),
+    ],
+    "leads": [
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="live_created_at", **LIVE),
+        IndexModel([("campaign_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="live_campaign_created_at", **LIVE),
+        IndexModel([("assigned_to", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="live_assigned_created_at", **LIVE),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="live_status_created_at", **LIVE),
+        IndexModel([("source", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="live_source_created_at", **LIVE),
+        IndexModel([("campaign_id", ASCENDING), ("status", ASCENDING)], name="live_campaign_status", **LIVE),
+        IndexModel([("search_tokens", ASCENDING)], name="live_search_tokens", **LIVE),
+        IndexModel([("dedup_keys", ASCENDING)], name="live_dedup_keys", **LIVE),
+        IndexModel([("score", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="live_score_created_at", **LIVE),
+        IndexModel([("campaign_id", ASCENDING), ("score", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="live_campaign_score_created_at", **LIVE),
+        IndexModel([("assigned_to", ASCENDING), ("score", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="live_assigned_score_created_at", **LIVE),
+    ],
+    "lead_activities": [
+        IndexModel([("lead_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "campaigns": [
+        IndexModel([("created_at", DESCENDING)], name="live_created_at", **LIVE),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="live_status_created_at", **LIVE),
+    ],
+    "lead_daily_stats": [
+        IndexModel([("date", ASCENDING), ("campaign_id", ASCENDING), ("assigned_to", ASCENDING), ("source", ASCENDING),
+                    ("status", ASCENDING), ("disqualification_reason", ASCENDING)], name="rollup_key", unique=True),
+        IndexModel([("campaign_id", ASCENDING), ("status", ASCENDING)]),
+    ],
+    "analytics_cache": [
+        IndexModel("expires_at", expireAfterSeconds=0),
+    ],
+    "daily_metrics": [
+        IndexModel([("campaign_id", ASCENDING), ("date", ASCENDING)]),
+    ],
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, str]:
+    """Create every declared index, one create_indexes batch per collection, concurrently"""
+    collections = list(INDEXES)
+    results = await asyncio.gather(
+        *(db[name].create_indexes(INDEXES[name]) for name in collections),
+        return_exceptions=True
+    )
+    return {
+        name: f"error: {result}" if isinstance(result, Exception) else "ok"
+        for name, result in zip(collections, results)
+    }
+
+
+async def _collection_report(db: AsyncIOMotorDatabase, name: str) -> Dict:
+    declared = {model.document["name"] for model in INDEXES.get(name, [])}
+    existing = set()
+    async for index in db[name].list_indexes():
+        existing.add(index["name"])
+    existing.discard("_id_")
+
+    unused = []
+    try:
+        async for stat in db[name].aggregate([{"$indexStats": {}}]):
+            if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0:
+                unused.append({"name": stat["name"], "since": stat["accesses"]["since"]})
+    except Exception:
+        # $indexStats needs clusterMonitor-style privileges on some deployments
+        unused = None
+
+    return {
+        "missing": sorted(declared - existing),
+        "extra": sorted(existing - declared),
+        "unused": unused
+    }
+
+
+async def index_report(db: AsyncIOMotorDatabase) -> Dict[str, Dict]:
+    """Compare declared indexes with the database: missing, extra and unused ($indexStats)"""
+    names = set(INDEXES) | set(await db.list_collection_names())
+    names = sorted(n for n in names if not n.startswith("system."))
+    reports = await asyncio.gather(*(_collection_report(db, name) for name in names))
+    return dict(zip(names, reports))
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from app.database import connect_to_mongo, close_mongo_connection, get_db
+
+    parser = argparse.ArgumentParser(description="Index drift report")
+    parser.add_argument("--create", action="store_true", help="build missing indexes before reporting")
+    args = parser.parse_args()
+
+    async def main():
+        await connect_to_mongo(with_indexes=args.create)
+        try:
+            print(json.dumps(await index_report(get_db()), indent=2, default=str))
+        finally:
+            await close_mongo_connection()
+
+    asyncio.run(main())
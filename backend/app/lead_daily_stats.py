@@ -0,0 +1,256 @@
+"""Daily lead rollup (lead_daily_stats).
+
+One document per (date, campaign_id, assigned_to, source, status,
+disqualification_reason) holding ``count``: the number of live leads
+created that day that currently have those values. ``date`` is the
+creation day in ANALYTICS_TIMEZONE, stored as a naive midnight datetime.
+disqualification_reason is only kept for disqualified leads.
+
+Lead writes report changes to ``lead_daily_stats`` (a LeadDailyStats):
+a new lead adds 1 to its key, a change moves 1 from the old key to the new
+one, a delete removes 1. Deltas are merged in memory and flushed as $inc
+upserts every LEAD_DAILY_STATS_FLUSH_MS, so analytics over N days read
+about N x (distinct keys per day) small documents instead of every lead.
+
+Writes that bypass the API (manual fixes, ad-hoc scripts) and changes to
+ANALYTICS_TIMEZONE need a rebuild. Run ``python -m app.lead_daily_stats``
+from the backend directory, ideally in a quiet period: increments flushed
+while it runs can be lost.
+"""
+from typing import Dict, List, Optional, Tuple
+from collections import Counter
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.config import settings
+from app.database import get_db
+from app.lead_overview import overview_facets, trend_bucket
+from app.analytics_cache import analytics_cache, campaign_scopes, rollup_scope
+import asyncio
+import time
+
+ROLLUP_FIELDS = ("campaign_id", "assigned_to", "source", "status", "disqualification_reason")
+
+# Lead fields a write must read back to report its rollup change
+ROLLUP_PROJECTION = {"created_at": 1, "is_deleted": 1, **{field: 1 for field in ROLLUP_FIELDS}}
+
+RollupKey = Tuple[datetime, Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def rollup_day(created_at: datetime, zone: Optional[ZoneInfo] = None) -> datetime:
+    """Creation day of a lead in ANALYTICS_TIMEZONE as a naive midnight"""
+    zone = zone or ZoneInfo(settings.ANALYTICS_TIMEZONE)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    local = created_at.astimezone(zone)
+    return datetime(local.year, local.month, local.day)
+
+
+def rollup_key(lead: Dict) -> Optional[RollupKey]:
+    """The lead's rollup key, or None when it is not counted (deleted, no created_at)"""
+    if lead.get("is_deleted") or not lead.get("created_at"):
+        return None
+    status = lead.get("status")
+    reason = lead.get("disqualification_reason") if status == "disqualified" else None
+    return (rollup_day(lead["created_at"]), lead.get("campaign_id"), lead.get("assigned_to"),
+            lead.get("source"), status, reason)
+
+
+def key_filter(key: RollupKey) -> Dict:
+    return {"date": key[0], **dict(zip(ROLLUP_FIELDS, key[1:]))}
+
+
+class LeadDailyStats:
+    """Merges rollup deltas in memory and flushes them as $inc upserts"""
+
+    def __init__(self):
+        self._pending: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.deltas = 0
+        self.flushes = 0
+        self.updates_sent = 0
+        self.failed_updates = 0
+        self.total_flush_ms = 0.0
+
+    def add(self, lead: Dict, delta: int = 1):
+        """Count a created (delta=1) or deleted (delta=-1) lead"""
+        key = rollup_key(lead)
+        if key is not None:
+            self._pending[key] += delta
+            self.deltas += 1
+
+    def move(self, before: Dict, after: Dict):
+        """Move a changed lead from its old key to its new one"""
+        old_key, new_key = rollup_key(before), rollup_key(after)
+        if old_key == new_key:
+            return
+        if old_key is not None:
+            self._pending[old_key] -= 1
+        if new_key is not None:
+            self._pending[new_key] += 1
+        self.deltas += 1
+
+    async def flush(self):
+        """Send every pending delta: one upsert per rollup key"""
+        pending, self._pending = self._pending, Counter()
+        keys = [key for key, count in pending.items() if count]
+        if not keys:
+            return
+
+        updates = [UpdateOne(key_filter(key), {"$inc": {"count": pending[key]}}, upsert=True) for key in keys]
+        started = time.perf_counter()
+        try:
+            await get_db().lead_daily_stats.bulk_write(updates, ordered=False)
+        except BulkWriteError as e:
+            # Failed upserts (e.g. two racing inserts of one key) were not applied - retry them
+            write_errors = e.details.get("writeErrors", [])
+            for write_error in write_errors:
+                key = keys[write_error["index"]]
+                self._pending[key] += pending[key]
+            self.failed_updates += len(write_errors)
+            print(f"⚠️ Lead daily stats flush: {len(write_errors)} updates failed, retrying next flush")
+        except Exception as e:
+            # Outcome unknown; retrying could double count
+            self.failed_updates += len(updates)
+            print(f"❌ Lead daily stats flush failed, {len(updates)} updates dropped: {str(e)}")
+
+        # Rollup results cached while these deltas were pending are stale now
+        await analytics_cache.bump({rollup_scope(scope) for scope in campaign_scopes(key[1] for key in keys)})
+
+        self.flushes += 1
+        self.updates_sent += len(updates)
+        self.total_flush_ms += (time.perf_counter() - started) * 1000
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), settings.LEAD_DAILY_STATS_FLUSH_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️ Lead daily stats flush failed: {str(e)}")
+
+    def start(self):
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop after a final flush (never cancelled mid-write)"""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "pending_keys": len(self._pending),
+            "deltas": self.deltas,
+            "flushes": self.flushes,
+            "updates_sent": self.updates_sent,
+            "failed_updates": self.failed_updates,
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0
+        }
+
+
+lead_daily_stats = LeadDailyStats()
+
+
+# Read side: the analytics endpoints in rollup mode
+
+def day_range(start_date: date, end_date: date) -> Dict:
+    return {"$gte": datetime(start_date.year, start_date.month, start_date.day),
+            "$lte": datetime(end_date.year, end_date.month, end_date.day)}
+
+
+def rollup_overview_pipeline(start_date: date, end_date: date, granularity: str) -> List[Dict]:
+    # Rollup dates are already local days, so buckets are truncated in UTC
+    return [
+        {"$match": {"date": day_range(start_date, end_date), "count": {"$ne": 0}}},
+        {"$facet": overview_facets(trend_bucket("$date", granularity, "UTC"), weight="$count")}
+    ]
+
+
+def localize_buckets(buckets: List[Dict], zone: ZoneInfo) -> List[Dict]:
+    """Rollup trend buckets (naive local midnights) as the UTC instants $dateTrunc returns"""
+    return [
+        {**bucket, "_id": bucket["_id"].replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)}
+        for bucket in buckets
+    ]
+
+
+def rollup_team_pipeline(start_date: date, end_date: date) -> List[Dict]:
+    def status_count(value):
+        return {"$sum": {"$cond": [{"$eq": ["$status", value]}, "$count", 0]}}
+
+    return [
+        {"$match": {"date": day_range(start_date, end_date), "assigned_to": {"$ne": None}, "count": {"$ne": 0}}},
+        {"$group": {
+            "_id": "$assigned_to",
+            "total_leads": {"$sum": "$count"},
+            "qualified": status_count("qualified"),
+            "disqualified": status_count("disqualified"),
+            "contacted": status_count("contacted")
+        }},
+        {"$match": {"total_leads": {"$gt": 0}}},
+        {"$sort": {"total_leads": -1}}
+    ]
+
+
+def rollup_status_pipeline(match: Dict) -> List[Dict]:
+    return [
+        {"$match": {**match, "count": {"$ne": 0}}},
+        {"$group": {"_id": "$status", "count": {"$sum": "$count"}}}
+    ]
+
+
+# Rebuild
+
+def rebuild_pipeline(tz: str) -> List[Dict]:
+    day = {"$dateToParts": {"date": "$created_at", "timezone": tz}}
+    return [
+        {"$match": {"is_deleted": False, "created_at": {"$type": "date"}}},
+        {"$group": {
+            "_id": {
+                "date": {"$let": {"vars": {"p": day}, "in": {"$dateFromParts": {
+                    "year": "$$p.year", "month": "$$p.month", "day": "$$p.day"
+                }}}},
+                **{field: {"$ifNull": [f"${field}", None]} for field in ROLLUP_FIELDS if field != "disqualification_reason"},
+                "disqualification_reason": {"$cond": [
+                    {"$eq": ["$status", "disqualified"]},
+                    {"$ifNull": ["$disqualification_reason", None]},
+                    None
+                ]}
+            },
+            "count": {"$sum": 1}
+        }},
+        {"$replaceWith": {"$mergeObjects": ["$_id", {"count": "$count"}]}},
+        {"$out": "lead_daily_stats"}
+    ]
+
+
+async def rebuild(db: AsyncIOMotorDatabase):
+    """Recompute lead_daily_stats from the leads collection ($out replaces it atomically)"""
+    await db.leads.aggregate(rebuild_pipeline(settings.ANALYTICS_TIMEZONE), allowDiskUse=True).to_list(length=None)
+
+
+if __name__ == "__main__":
+    from app.database import connect_to_mongo, close_mongo_connection
+
+    async def rebuild_all():
+        await connect_to_mongo()
+        try:
+            started = time.perf_counter()
+            await rebuild(get_db())
+            keys = await get_db().lead_daily_stats.estimated_document_count()
+            print(f"✅ Rebuilt lead_daily_stats: {keys} rollup documents in {time.perf_counter() - started:.1f}s")
+        finally:
+            await close_mongo_connection()
+
+    asyncio.run(rebuild_all())
@@ -0,0 +1,264 @@
+"""Duplicate lead detection.
+
+Every lead stores ``dedup_keys``, the normalized identities it can collide on:
+
+    email:<address>           lowercased email
+    phone:+<digits>           E.164 phone (LEAD_DEFAULT_COUNTRY_CODE added
+                              to national numbers)
+    org:<company>|<name>      company + person name fingerprint
+
+The multikey partial index ``live_dedup_keys`` turns "does this lead already
+exist" into one ``$in`` lookup per batch. Imports also keep an in-memory map
+of keys seen so far, so duplicates inside one file are caught before they
+reach the database.
+
+Run ``python -m app.lead_dedup`` from the backend directory to backfill keys
+and report existing duplicate clusters (``--apply`` marks them, updating
+campaign counters and the daily rollup like the API does).
+"""
+from typing import Dict, List, Optional
+from bson.objectid import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.config import settings
+from app.models.lead import LeadStatus, DisqualificationReason
+from app.lead_search import words, digits
+
+DEDUP_FIELD = "dedup_keys"
+DEDUP_SOURCE_FIELDS = ("name", "email", "phone", "company")
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email or None
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """E.164 form of phone, or None when there are too few digits to be a number"""
+    if not phone:
+        return None
+    number = digits(phone)
+    if phone.strip().startswith("00"):
+        number = number[2:]
+    elif not phone.strip().startswith("+"):
+        number = number.lstrip("0")
+        if len(number) <= 10:
+            number = settings.LEAD_DEFAULT_COUNTRY_CODE + number
+    if len(number) < 8:
+        return None
+    return f"+{number}"
+
+
+def org_fingerprint(company: Optional[str], name: Optional[str]) -> Optional[str]:
+    """Order-insensitive company + name fingerprint (both must be present)"""
+    company_words = sorted(words(company))
+    name_words = sorted(words(name))
+    if not company_words or not name_words:
+        return None
+    return f"{' '.join(company_words)}|{' '.join(name_words)}"
+
+
+def dedup_keys(lead: Dict) -> List[str]:
+    """Keys a lead can be matched on (call on create and whenever source fields change)"""
+    keys = []
+    email = normalize_email(lead.get("email"))
+    if email:
+        keys.append(f"email:{email}")
+    phone = normalize_phone(lead.get("phone"))
+    if phone:
+        keys.append(f"phone:{phone}")
+    org = org_fingerprint(lead.get("company"), lead.get("name"))
+    if org:
+        keys.append(f"org:{org}")
+    return keys
+
+
+def mark_duplicate(lead: Dict, original_id: str):
+    """Flag a new lead document as a duplicate according to LEAD_DUPLICATE_POLICY"""
+    lead["duplicate_of"] = original_id
+    if settings.LEAD_DUPLICATE_POLICY == "disqualify":
+        lead["status"] = LeadStatus.DISQUALIFIED.value
+        lead["disqualification_reason"] = DisqualificationReason.DUPLICATE.value
+        lead["disqualification_notes"] = f"Duplicate of lead {original_id}"
+
+
+class DuplicateDetector:
+    """Finds duplicates for batches of new lead documents.
+
+    Keys already seen during this import are kept in memory, so one
+    detector should live for a whole import and see every chunk in order.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._seen: Dict[str, str] = {}
+
+    async def _existing(self, keys: List[str]) -> Dict[str, str]:
+        """key -> id of the oldest live lead holding it (one indexed query)"""
+        if not keys:
+            return {}
+        owners: Dict[str, str] = {}
+        cursor = self.db.leads.find(
+            {DEDUP_FIELD: {"$in": keys}, "is_deleted": False},
+            {DEDUP_FIELD: 1, "duplicate_of": 1}
+        ).sort([("created_at", 1), ("_id", 1)])
+        async for lead in cursor:
+            original = lead.get("duplicate_of") or str(lead["_id"])
+            for key in lead.get(DEDUP_FIELD, []):
+                owners.setdefault(key, original)
+        return owners
+
+    async def check(self, documents: List[Dict]) -> List[int]:
+        """Mark duplicates among documents in place and return their positions.
+
+        Documents are given an _id if they have none, so later rows of the
+        same import can point at them.
+        """
+        for doc in documents:
+            doc.setdefault("_id", ObjectId())
+            doc[DEDUP_FIELD] = dedup_keys(doc)
+
+        lookup = {key for doc in documents for key in doc[DEDUP_FIELD] if key not in self._seen}
+        self._seen.update(await self._existing(sorted(lookup)))
+
+        duplicates = []
+        for i, doc in enumerate(documents):
+            original = next((self._seen[key] for key in doc[DEDUP_FIELD] if key in self._seen), None)
+            if original:
+                mark_duplicate(doc, original)
+                duplicates.append(i)
+            else:
+                original = str(doc["_id"])
+            for key in doc[DEDUP_FIELD]:
+                self._seen.setdefault(key, original)
+        return duplicates
+
+
+async def find_duplicate_clusters(db: AsyncIOMotorDatabase) -> List[List[Dict]]:
+    """Group existing live leads into duplicate clusters.
+
+    Each dedup key is a blocking key: leads are only compared with leads
+    sharing a key, found with one $group over the unwound keys instead of
+    pairwise comparison. Blocks sharing a lead are merged (union-find), and
+    each cluster is ordered oldest first.
+    """
+    pipeline = [
+        {"$match": {"is_deleted": False, DEDUP_FIELD: {"$exists": True, "$ne": []}}},
+        {"$project": {DEDUP_FIELD: 1, "created_at": 1}},
+        {"$unwind": f"${DEDUP_FIELD}"},
+        {"$group": {
+            "_id": f"${DEDUP_FIELD}",
+            "leads": {"$push": {"id": "$_id", "created_at": "$created_at"}},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+
+    parent: Dict[ObjectId, ObjectId] = {}
+    created: Dict[ObjectId, object] = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    async for block in db.leads.aggregate(pipeline, allowDiskUse=True):
+        ids = []
+        for lead in block["leads"]:
+            parent.setdefault(lead["id"], lead["id"])
+            created[lead["id"]] = lead.get("created_at")
+            ids.append(lead["id"])
+        root = find(ids[0])
+        for other in ids[1:]:
+            parent[find(other)] = root
+
+    clusters: Dict[ObjectId, List[ObjectId]] = {}
+    for lead_id in parent:
+        clusters.setdefault(find(lead_id), []).append(lead_id)
+
+    return [
+        [{"id": str(i), "created_at": created[i]} for i in sorted(members, key=lambda i: (created[i] is None, created[i] or 0, i))]
+        for members in clusters.values()
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    from pymongo import UpdateOne
+    from app.database import connect_to_mongo, close_mongo_connection, get_db
+    from app.campaign_counters import campaign_counters, status_change_inc
+    from app.lead_daily_stats import lead_daily_stats, ROLLUP_PROJECTION
+
+    parser = argparse.ArgumentParser(description="Duplicate lead report")
+    parser.add_argument("--apply", action="store_true", help="mark every non-oldest lead of a cluster as a duplicate")
+    args = parser.parse_args()
+
+    async def backfill(db, batch_size: int = 1000) -> int:
+        updated = 0
+        batch = []
+        projection = {field: 1 for field in DEDUP_SOURCE_FIELDS}
+        async for lead in db.leads.find({DEDUP_FIELD: {"$exists": False}}, projection):
+            batch.append(UpdateOne({"_id": lead["_id"]}, {"$set": {DEDUP_FIELD: dedup_keys(lead)}}))
+            if len(batch) >= batch_size:
+                await db.leads.bulk_write(batch, ordered=False)
+                updated += len(batch)
+                batch = []
+        if batch:
+            await db.leads.bulk_write(batch, ordered=False)
+            updated += len(batch)
+        return updated
+
+    async def apply(db, clusters: List[List[Dict]]):
+        """Mark duplicates and carry the status change into campaign counters and the rollup"""
+        originals = {lead["id"]: cluster[0]["id"] for cluster in clusters for lead in cluster[1:]}
+        if not originals:
+            return
+        leads = await db.leads.find(
+            {"_id": {"$in": [ObjectId(lead_id) for lead_id in originals]}, "duplicate_of": {"$exists": False}},
+            {"source": 1, **ROLLUP_PROJECTION}
+        ).to_list(length=None)
+
+        # Guarded on the status we read, so the deltas below match what was written
+        changes = []
+        for lead in leads:
+            update = {}
+            mark_duplicate(update, originals[str(lead["_id"])])
+            changes.append((lead, update))
+        if not changes:
+            return
+        await db.leads.bulk_write([
+            UpdateOne({"_id": lead["_id"], "duplicate_of": {"$exists": False}, "status": lead.get("status")}, {"$set": update})
+            for lead, update in changes
+        ], ordered=False)
+        applied = {
+            lead["_id"] async for lead in db.leads.find(
+                {"_id": {"$in": [lead["_id"] for lead, _ in changes]}, "duplicate_of": {"$exists": True}},
+                {"_id": 1}
+            )
+        }
+
+        for lead, update in changes:
+            if lead["_id"] not in applied or "status" not in update:
+                continue
+            campaign_counters.add(lead.get("campaign_id"), status_change_inc(lead.get("status"), update["status"], lead.get("source")))
+            lead_daily_stats.move(lead, {**lead, **update})
+        await campaign_counters.flush()
+        await lead_daily_stats.flush()
+        print(f"✅ Marked {len(applied)} leads as duplicates")
+
+    async def main():
+        await connect_to_mongo(with_indexes=False)
+        db = get_db()
+        try:
+            print(f"✅ Backfilled dedup keys on {await backfill(db)} leads")
+            clusters = await find_duplicate_clusters(db)
+            duplicates = sum(len(c) - 1 for c in clusters)
+            print(f"🔍 Found {len(clusters)} duplicate clusters ({duplicates} duplicate leads)")
+
+            if args.apply:
+                await apply(db, clusters)
+        finally:
+            await close_mongo_connection()
+
+    asyncio.run(main())
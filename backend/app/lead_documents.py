@@ -0,0 +1,51 @@
+"""Document builders shared by single-lead and bulk/file import write paths."""
+from typing import Dict, Optional
+from datetime import datetime, timezone
+from app.models.lead import LeadCreate, LeadStatus
+from app.models.lead_activity import ActivityType
+from app.lead_search import search_fields
+
+
+def build_lead_document(request: LeadCreate, created_by: str, now: Optional[datetime] = None) -> Dict:
+    """New lead document from a LeadCreate payload"""
+    now = now or datetime.now(timezone.utc)
+    lead_data = request.dict()
+    lead_data["created_by"] = created_by
+    lead_data["status"] = lead_data.get("status", LeadStatus.NEW).value if hasattr(lead_data.get("status"), "value") else lead_data.get("status", "new")
+    lead_data["source"] = lead_data.get("source").value if hasattr(lead_data.get("source"), "value") else lead_data.get("source")
+    lead_data["created_at"] = now
+    lead_data["updated_at"] = now
+    lead_data["is_deleted"] = False
+    lead_data["score"] = 0
+    lead_data.update(search_fields(lead_data))
+    return lead_data
+
+
+def created_activity(lead_data: Dict, performed_by: str) -> Dict:
+    """CREATED lead_activities entry for an inserted lead"""
+    return {
+        "lead_id": str(lead_data["_id"]),
+        "activity_type": ActivityType.CREATED.value,
+        "description": f"Lead created from {lead_data['source']}",
+        "performed_by": performed_by,
+        "metadata": {"source": lead_data['source'], "duplicate_of": lead_data.get("duplicate_of")},
+        "created_at": datetime.now(timezone.utc)
+    }
+
+
+def follow_up_task(lead_data: Dict, created_by: str) -> Dict:
+    """Follow-up task auto-created for an assigned lead"""
+    return {
+        "title": f"Follow up: {lead_data['name']}",
+        "description": f"Contact lead {lead_data['name']} from {lead_data['source']} source\nCompany: {lead_data.get('company', 'N/A')}\nPhone: {lead_data.get('phone', 'N/A')}\nEmail: {lead_data.get('email', 'N/A')}",
+        "assigned_to": lead_data.get("assigned_to"),
+        "created_by": created_by,
+        "status": "todo",
+        "priority": "medium",
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc),
+        "is_deleted": False,
+        "time_logged": 0,
+        "tags": ["lead-followup"],
+        "lead_id": str(lead_data["_id"])
+    }
@@ -0,0 +1,186 @@
+"""Streaming CSV/XLSX lead imports run as background jobs.
+
+The upload is streamed to disk, then parsed incrementally (csv module or
+openpyxl read_only) in a worker thread one chunk at a time. Each chunk is
+validated against LeadCreate and inserted through the batched import path,
+and progress is written to the job document in ``lead_import_jobs`` so
+clients can poll it. Memory use is bounded by the chunk size, not the file.
+"""
+from typing import Dict, Iterator, List, Optional
+from datetime import datetime, timezone
+from itertools import islice
+from bson.objectid import ObjectId
+from fastapi import UploadFile
+from pydantic import ValidationError
+from app.config import settings
+from app.database import get_db
+from app.models.lead import LeadCreate
+from app.lead_import import insert_lead_chunk
+from app.lead_dedup import DuplicateDetector
+import aiofiles
+import asyncio
+import csv
+import os
+import tempfile
+
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx")
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+def file_extension(filename: Optional[str]) -> str:
+    return os.path.splitext(filename or "")[1].lower()
+
+
+async def save_upload(upload: UploadFile) -> str:
+    """Stream an upload to a temporary file without holding it in memory"""
+    directory = settings.LEAD_IMPORT_UPLOAD_DIR or tempfile.gettempdir()
+    fd, path = tempfile.mkstemp(suffix=file_extension(upload.filename), prefix="lead_import_", dir=directory)
+    os.close(fd)
+
+    async with aiofiles.open(path, "wb") as out:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            await out.write(chunk)
+    return path
+
+
+def _normalize_header(header) -> str:
+    return str(header or "").strip().lower().replace(" ", "_")
+
+
+def _iter_csv(path: str) -> Iterator[Dict]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            yield {_normalize_header(k): v for k, v in row.items() if k is not None}
+
+
+def _iter_xlsx(path: str) -> Iterator[Dict]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [_normalize_header(h) for h in next(rows, [])]
+        for values in rows:
+            yield {h: v for h, v in zip(headers, values) if h}
+    finally:
+        workbook.close()
+
+
+def iter_rows(path: str) -> Iterator[Dict]:
+    """Rows of a CSV or XLSX file as dicts keyed by normalized header"""
+    if file_extension(path) == ".xlsx":
+        return _iter_xlsx(path)
+    return _iter_csv(path)
+
+
+def _lead_payload(row: Dict, defaults: Dict) -> Dict:
+    """Spreadsheet row -> LeadCreate kwargs (blank cells are missing values)"""
+    payload = {}
+    for key, value in row.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "":
+            continue
+        payload[key] = str(value) if key == "phone" else value
+
+    if isinstance(payload.get("tags"), str):
+        payload["tags"] = [t.strip() for t in payload["tags"].split(",") if t.strip()]
+    for key, value in defaults.items():
+        if value and not payload.get(key):
+            payload[key] = value
+    return payload
+
+
+def _describe_validation_error(e: ValidationError) -> str:
+    first = e.errors()[0]
+    field = ".".join(str(part) for part in first.get("loc", ())) or "row"
+    return f"{field}: {first.get('msg', 'invalid value')}"
+
+
+async def create_job(filename: str, created_by: str, defaults: Dict) -> str:
+    now = datetime.now(timezone.utc)
+    result = await get_db().lead_import_jobs.insert_one({
+        "filename": filename,
+        "created_by": created_by,
+        "defaults": defaults,
+        "status": "queued",
+        "processed_rows": 0,
+        "imported": 0,
+        "duplicates": 0,
+        "failed": 0,
+        "errors": [],
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None
+    })
+    return str(result.inserted_id)
+
+
+async def run_import_job(job_id: str, path: str, created_by: str, defaults: Dict):
+    """Parse, validate and insert the file chunk by chunk, recording progress on the job"""
+    db = get_db()
+    job_oid = ObjectId(job_id)
+    chunk_size = settings.LEAD_IMPORT_CHUNK_SIZE
+    detector = DuplicateDetector(db)
+
+    await db.lead_import_jobs.update_one(
+        {"_id": job_oid},
+        {"$set": {"status": "running", "updated_at": datetime.now(timezone.utc)}}
+    )
+
+    try:
+        rows = await asyncio.to_thread(iter_rows, path)
+        row_number = 1  # header row
+        while True:
+            batch = await asyncio.to_thread(lambda: list(islice(rows, chunk_size)))
+            if not batch:
+                break
+
+            valid: List[LeadCreate] = []
+            valid_rows: List[int] = []
+            errors: List[Dict] = []
+            for row in batch:
+                row_number += 1
+                if not any(str(v).strip() for v in row.values() if v is not None):
+                    continue  # blank spreadsheet row
+                try:
+                    valid.append(LeadCreate(**_lead_payload(row, defaults)))
+                    valid_rows.append(row_number)
+                except ValidationError as e:
+                    errors.append({"index": row_number, "error": _describe_validation_error(e)})
+
+            imported = duplicates = 0
+            if valid:
+                result = await insert_lead_chunk(db, valid, created_by, row_numbers=valid_rows, detector=detector)
+                imported = len(result["inserted_ids"])
+                duplicates = len(result["duplicates"])
+                errors.extend(result["errors"])
+
+            await db.lead_import_jobs.update_one(
+                {"_id": job_oid},
+                {
+                    "$inc": {"processed_rows": len(batch), "imported": imported, "duplicates": duplicates, "failed": len(errors)},
+                    "$push": {"errors": {"$each": errors, "$slice": settings.LEAD_IMPORT_MAX_ERRORS}},
+                    "$set": {"updated_at": datetime.now(timezone.utc)}
+                }
+            )
+
+        status = "completed"
+        failure = None
+    except Exception as e:
+        status = "failed"
+        failure = str(e)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    now = datetime.now(timezone.utc)
+    await db.lead_import_jobs.update_one(
+        {"_id": job_oid},
+        {"$set": {"status": status, "error": failure, "updated_at": now, "finished_at": now}}
+    )
@@ -0,0 +1,89 @@
+"""Conversion funnel: lead counts per status in one aggregation.
+
+Live mode is a single $group by status over the matching leads; with a
+campaign filter it runs on the (campaign_id, status) index. Rollup mode
+sums lead_daily_stats instead (see app.lead_daily_stats).
+
+Responses are cached, and concurrent identical requests coalesced, by
+app.analytics_cache.
+"""
+from typing import Dict, Optional
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.config import settings
+from app.lead_overview import date_bounds
+from app.lead_daily_stats import rollup_status_pipeline
+
+FUNNEL_STAGES = (
+    ("new", "New Leads"),
+    ("contacted", "Contacted"),
+    ("qualified", "Qualified"),
+    ("converted", "Converted"),
+    ("disqualified", "Disqualified")
+)
+
+
+def live_match(
+    campaign_id: Optional[str],
+    assigned_to: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date]
+) -> Dict:
+    """Leads filter; the date window is whole days of ANALYTICS_TIMEZONE on created_at"""
+    match = {"is_deleted": False}
+    if campaign_id:
+        match["campaign_id"] = campaign_id
+    if assigned_to:
+        match["assigned_to"] = assigned_to
+    if start_date or end_date:
+        zone = ZoneInfo(settings.ANALYTICS_TIMEZONE)
+        window = {}
+        if start_date:
+            window["$gte"] = date_bounds(start_date, start_date, zone)[0]
+        if end_date:
+            window["$lt"] = date_bounds(end_date, end_date, zone)[1]
+        match["created_at"] = window
+    return match
+
+
+def rollup_match(
+    campaign_id: Optional[str],
+    assigned_to: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date]
+) -> Dict:
+    match = {}
+    if campaign_id:
+        match["campaign_id"] = campaign_id
+    if assigned_to:
+        match["assigned_to"] = assigned_to
+    if start_date or end_date:
+        window = {}
+        if start_date:
+            window["$gte"] = datetime(start_date.year, start_date.month, start_date.day)
+        if end_date:
+            window["$lte"] = datetime(end_date.year, end_date.month, end_date.day)
+        match["date"] = window
+    return match
+
+
+async def funnel_counts(
+    db: AsyncIOMotorDatabase,
+    mode: str,
+    campaign_id: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Dict[str, int]:
+    """status -> lead count for the filters"""
+    filters = (campaign_id, assigned_to, start_date, end_date)
+    if mode == "rollup":
+        cursor = db.lead_daily_stats.aggregate(rollup_status_pipeline(rollup_match(*filters)))
+    else:
+        cursor = db.leads.aggregate([
+            {"$match": live_match(*filters)},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ])
+    return {row["_id"]: row["count"] async for row in cursor}
+
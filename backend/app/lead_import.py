@@ -0,0 +1,108 @@
+"""Batched lead import shared by POST /api/leads/bulk and file imports."""
+from typing import Dict, List, Iterable, Tuple, Optional
+from collections import Counter
+from datetime import datetime, timezone
+from pymongo.errors import BulkWriteError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.config import settings
+from app.models.lead import LeadCreate
+from app.lead_documents import build_lead_document, created_activity, follow_up_task
+from app.lead_dedup import DuplicateDetector
+from app.campaign_counters import new_lead_inc, campaign_inc_updates
+from app.lead_daily_stats import lead_daily_stats
+from app.analytics_cache import analytics_cache
+import asyncio
+
+
+def chunked(items: List, size: int) -> Iterable[Tuple[int, List]]:
+    """(offset, chunk) pairs of at most size items"""
+    for offset in range(0, len(items), size):
+        yield offset, items[offset:offset + size]
+
+
+async def insert_lead_chunk(
+    db: AsyncIOMotorDatabase,
+    leads: List[LeadCreate],
+    created_by: str,
+    first_index: int = 0,
+    row_numbers: Optional[List[int]] = None,
+    detector: Optional[DuplicateDetector] = None
+) -> Dict:
+    """Insert one chunk of leads and apply its side effects in bulk.
+
+    Leads go in with one unordered insert_many. CREATED activities and
+    follow-up tasks for the inserted leads are written with insert_many, and
+    campaign counter deltas (app.campaign_counters) are summed per campaign
+    and sent in one bulk_write; daily rollup deltas go to
+    app.lead_daily_stats. Row indexes in the result are offset by
+    first_index, or taken from row_numbers when the chunk is a filtered
+    subset of a file.
+    Duplicates found by detector are inserted flagged (see app.lead_dedup)
+    and listed under "duplicates".
+    """
+    now = datetime.now(timezone.utc)
+    documents = [build_lead_document(lead, created_by, now) for lead in leads]
+    duplicate_positions = await detector.check(documents) if detector else []
+
+    errors = {}
+    try:
+        await db.leads.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            errors[write_error["index"]] = write_error.get("errmsg", "Failed to insert lead")
+
+    inserted = [doc for i, doc in enumerate(documents) if i not in errors]
+
+    side_effects = []
+    if inserted:
+        side_effects.append(db.lead_activities.insert_many(
+            [created_activity(doc, created_by) for doc in inserted], ordered=False
+        ))
+
+    tasks = [follow_up_task(doc, created_by) for doc in inserted if doc.get("assigned_to")]
+    if tasks:
+        side_effects.append(db.tasks.insert_many(tasks, ordered=False))
+
+    campaign_deltas: Dict[str, Counter] = {}
+    for doc in inserted:
+        if doc.get("campaign_id"):
+            campaign_deltas.setdefault(doc["campaign_id"], Counter()).update(new_lead_inc(doc))
+    campaign_updates = campaign_inc_updates(campaign_deltas)
+    if campaign_updates:
+        side_effects.append(db.campaigns.bulk_write(campaign_updates, ordered=False))
+
+    await asyncio.gather(*side_effects)
+
+    for doc in inserted:
+        lead_daily_stats.add(doc)
+    if inserted:
+        await analytics_cache.invalidate(*{doc.get("campaign_id") for doc in inserted})
+
+    def row(i: int) -> int:
+        return row_numbers[i] if row_numbers else first_index + i
+
+    return {
+        "inserted_ids": [str(doc["_id"]) for doc in inserted],
+        "duplicates": [
+            {"index": row(i), "lead_id": str(documents[i]["_id"]), "duplicate_of": documents[i]["duplicate_of"]}
+            for i in duplicate_positions if i not in errors
+        ],
+        "errors": [
+            {"index": row(i), "error": message}
+            for i, message in sorted(errors.items())
+        ]
+    }
+
+
+async def import_leads(db: AsyncIOMotorDatabase, leads: List[LeadCreate], created_by: str) -> Dict:
+    """Import leads in LEAD_IMPORT_CHUNK_SIZE chunks"""
+    detector = DuplicateDetector(db)
+    inserted_ids: List[str] = []
+    duplicates: List[Dict] = []
+    errors: List[Dict] = []
+    for offset, chunk in chunked(leads, settings.LEAD_IMPORT_CHUNK_SIZE):
+        result = await insert_lead_chunk(db, chunk, created_by, first_index=offset, detector=detector)
+        inserted_ids.extend(result["inserted_ids"])
+        duplicates.extend(result["duplicates"])
+        errors.extend(result["errors"])
+    return {"inserted_ids": inserted_ids, "duplicates": duplicates, "errors": errors}
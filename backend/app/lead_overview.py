@@ -0,0 +1,83 @@
+"""Lead analytics overview as one aggregation.
+
+Status, source, disqualification reasons, the trend and the total are all
+computed by a single $facet over one $match on (is_deleted, created_at),
+so the leads in the range are read once instead of five times.
+
+Trend buckets come from $dateTrunc (MongoDB 5.0+) in the requested
+timezone and granularity. ``legacy_trend`` turns them back into the old
+``{"_id": {"year", "month", "day"}, "count"}`` rows.
+"""
+from typing import Dict, List, Tuple
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+TREND_GRANULARITIES = ("day", "week", "month")
+
+# Only the fields the facets read travel into $facet
+OVERVIEW_FIELDS = {"_id": 0, "status": 1, "source": 1, "disqualification_reason": 1, "created_at": 1}
+
+
+def date_bounds(start_date: date, end_date: date, zone: ZoneInfo) -> Tuple[datetime, datetime]:
+    """[start, end) in naive UTC covering start_date..end_date as calendar days in zone"""
+    start = datetime.combine(start_date, time.min, tzinfo=zone)
+    end = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=zone)
+    return (
+        start.astimezone(timezone.utc).replace(tzinfo=None),
+        end.astimezone(timezone.utc).replace(tzinfo=None)
+    )
+
+
+def overview_match(start: datetime, end: datetime) -> Dict:
+    return {"is_deleted": False, "created_at": {"$gte": start, "$lt": end}}
+
+
+def trend_bucket(date_field: str, granularity: str, tz: str) -> Dict:
+    trunc = {"date": date_field, "unit": granularity, "timezone": tz}
+    if granularity == "week":
+        trunc["startOfWeek"] = "monday"
+    return {"$dateTrunc": trunc}
+
+
+def overview_facets(trend_bucket_expr: Dict, weight=1) -> Dict:
+    """$facet stage body; weight is what each document counts for (1, or "$count" for rollups)"""
+    count = {"$sum": weight}
+    return {
+        "total": [{"$group": {"_id": None, "count": count}}],
+        "status_breakdown": [{"$group": {"_id": "$status", "count": count}}],
+        "source_breakdown": [{"$group": {"_id": "$source", "count": count}}],
+        "disqualification_reasons": [
+            {"$match": {"status": "disqualified"}},
+            {"$group": {"_id": "$disqualification_reason", "count": count}},
+            {"$sort": {"count": -1}}
+        ],
+        "trend": [
+            {"$group": {"_id": trend_bucket_expr, "count": count}},
+            {"$sort": {"_id": 1}}
+        ]
+    }
+
+
+def overview_pipeline(match: Dict, granularity: str, tz: str) -> List[Dict]:
+    return [
+        {"$match": match},
+        {"$project": OVERVIEW_FIELDS},
+        {"$facet": overview_facets(trend_bucket("$created_at", granularity, tz))}
+    ]
+
+
+def legacy_trend(buckets: List[Dict], zone: ZoneInfo) -> List[Dict]:
+    """$dateTrunc buckets as the old {"_id": {"year", "month", "day"}, "count"} rows"""
+    rows = []
+    for bucket in buckets:
+        local = bucket["_id"].replace(tzinfo=timezone.utc).astimezone(zone)
+        rows.append({"_id": {"year": local.year, "month": local.month, "day": local.day}, "count": bucket["count"]})
+    return rows
+
+
+def bucket_trend(buckets: List[Dict], zone: ZoneInfo) -> List[Dict]:
+    """$dateTrunc buckets as {"bucket": local ISO start, "count"} rows"""
+    return [
+        {"bucket": bucket["_id"].replace(tzinfo=timezone.utc).astimezone(zone).isoformat(), "count": bucket["count"]}
+        for bucket in buckets
+    ]
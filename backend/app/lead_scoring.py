@@ -0,0 +1,302 @@
+"""Vectorized lead scoring (Lead.score, 0-100).
+
+Each lead becomes a feature row, every feature scaled to [0, 1]:
+
+    source          prior weight of the lead source
+    industry        smoothed qualification rate of the lead's industry
+    seniority       designation keywords (founder/C-level > director > manager)
+    calls           log-scaled CALL_MADE / CONTACTED activity count
+    emails          log-scaled EMAIL_SENT activity count
+    meetings        log-scaled MEETING_SCHEDULED activity count
+    recency         exponential decay of last_contacted_at
+    campaign_rate   smoothed qualification rate of the lead's campaign
+
+and the score is the weighted sum of its row, computed for a whole batch
+with one matrix product. Disqualified leads score 0 and converted leads 100.
+
+Batches are rescored on demand (a campaign, a list of ids), and a
+background scorer debounces per-lead rescore requests raised by lead
+writes. Run ``python -m app.lead_scoring`` from the backend directory to
+rescore every live lead.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+from datetime import datetime, timezone
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.cache import TTLCache
+from app.config import settings
+from app.database import get_db
+from app.models.lead_activity import ActivityType
+import asyncio
+import numpy as np
+
+FEATURES = ("source", "industry", "seniority", "calls", "emails", "meetings", "recency", "campaign_rate")
+WEIGHTS = np.array([0.15, 0.10, 0.15, 0.15, 0.05, 0.15, 0.10, 0.15])
+
+SOURCE_WEIGHTS = {
+    "referral": 1.0,
+    "website": 0.8,
+    "event": 0.7,
+    "calling": 0.6,
+    "email_campaign": 0.5,
+    "social_media": 0.4,
+    "data_entry": 0.3,
+    "other": 0.2
+}
+
+SENIORITY_KEYWORDS = (
+    (("founder", "owner", "ceo", "cto", "cfo", "coo", "president", "chief", "partner"), 1.0),
+    (("vp", "vice", "director", "head"), 0.8),
+    (("manager", "lead", "principal"), 0.5),
+)
+
+ACTIVITY_FEATURES = {
+    ActivityType.CALL_MADE.value: "calls",
+    ActivityType.CONTACTED.value: "calls",
+    ActivityType.EMAIL_SENT.value: "emails",
+    ActivityType.MEETING_SCHEDULED.value: "meetings"
+}
+ACTIVITY_SATURATION = 10  # activity count that maxes out its feature
+
+RECENCY_HALF_LIFE_DAYS = 14
+
+# Rates are shrunk toward PRIOR_RATE as if RATE_PRIOR_WEIGHT decided leads had it
+PRIOR_RATE = 0.2
+RATE_PRIOR_WEIGHT = 20
+POSITIVE_STATUSES = ("qualified", "converted")
+DECIDED_STATUSES = ("qualified", "converted", "disqualified")
+
+SCORING_PROJECTION = {
+    "source": 1, "industry": 1, "designation": 1, "status": 1,
+    "campaign_id": 1, "last_contacted_at": 1, "score": 1
+}
+
+# Industry/campaign qualification rates change slowly; incremental rescoring reuses them
+_rate_cache = TTLCache(maxsize=10000, default_ttl=600)
+
+
+def seniority(designation: Optional[str]) -> float:
+    if not designation:
+        return 0.0
+    title = designation.lower()
+    for keywords, value in SENIORITY_KEYWORDS:
+        if any(keyword in title for keyword in keywords):
+            return value
+    return 0.2
+
+
+async def _rates(db: AsyncIOMotorDatabase, field: str, values: Set[str]) -> Dict[str, float]:
+    """Smoothed qualification rate per value of field (one $group for all cache misses)"""
+    rates = {}
+    missing = []
+    for value in values:
+        cached = _rate_cache.get((field, value))
+        if cached is None:
+            missing.append(value)
+        else:
+            rates[value] = cached
+
+    if missing:
+        pipeline = [
+            {"$match": {field: {"$in": missing}, "is_deleted": False, "status": {"$in": list(DECIDED_STATUSES)}}},
+            {"$group": {
+                "_id": f"${field}",
+                "decided": {"$sum": 1},
+                "positive": {"$sum": {"$cond": [{"$in": ["$status", list(POSITIVE_STATUSES)]}, 1, 0]}}
+            }}
+        ]
+        counts = {row["_id"]: row async for row in db.leads.aggregate(pipeline)}
+        for value in missing:
+            row = counts.get(value, {"decided": 0, "positive": 0})
+            rate = (row["positive"] + PRIOR_RATE * RATE_PRIOR_WEIGHT) / (row["decided"] + RATE_PRIOR_WEIGHT)
+            _rate_cache.set((field, value), rate)
+            rates[value] = rate
+    return rates
+
+
+async def _activity_counts(db: AsyncIOMotorDatabase, lead_ids: List[str]) -> Dict[str, Dict[str, int]]:
+    """lead_id -> {feature: count} for scored activity types"""
+    counts: Dict[str, Dict[str, int]] = {}
+    for start in range(0, len(lead_ids), 5000):
+        pipeline = [
+            {"$match": {
+                "lead_id": {"$in": lead_ids[start:start + 5000]},
+                "activity_type": {"$in": list(ACTIVITY_FEATURES)}
+            }},
+            {"$group": {"_id": {"lead": "$lead_id", "type": "$activity_type"}, "count": {"$sum": 1}}}
+        ]
+        async for row in db.lead_activities.aggregate(pipeline):
+            feature = ACTIVITY_FEATURES[row["_id"]["type"]]
+            lead_counts = counts.setdefault(row["_id"]["lead"], {})
+            lead_counts[feature] = lead_counts.get(feature, 0) + row["count"]
+    return counts
+
+
+def feature_matrix(
+    leads: List[Dict],
+    activity_counts: Dict[str, Dict[str, int]],
+    industry_rates: Dict[str, float],
+    campaign_rates: Dict[str, float],
+    now: Optional[datetime] = None
+) -> np.ndarray:
+    """(len(leads), len(FEATURES)) matrix with every feature in [0, 1]"""
+    now = now or datetime.now(timezone.utc)
+    n = len(leads)
+    ids = [str(lead["_id"]) for lead in leads]
+
+    source = np.array([SOURCE_WEIGHTS.get(lead.get("source"), 0.2) for lead in leads])
+    industry = np.array([industry_rates.get(lead.get("industry"), PRIOR_RATE) for lead in leads])
+    senior = np.array([seniority(lead.get("designation")) for lead in leads])
+    campaign = np.array([campaign_rates.get(lead.get("campaign_id"), PRIOR_RATE) for lead in leads])
+
+    activity = np.zeros((n, 3))
+    for i, lead_id in enumerate(ids):
+        lead_counts = activity_counts.get(lead_id)
+        if lead_counts:
+            activity[i] = (lead_counts.get("calls", 0), lead_counts.get("emails", 0), lead_counts.get("meetings", 0))
+    activity = np.minimum(np.log1p(activity) / np.log1p(ACTIVITY_SATURATION), 1.0)
+
+    # Days since last contact; never contacted leads get no recency credit
+    days = np.full(n, np.inf)
+    for i, lead in enumerate(leads):
+        contacted = lead.get("last_contacted_at")
+        if contacted:
+            if contacted.tzinfo is None:
+                contacted = contacted.replace(tzinfo=timezone.utc)
+            days[i] = max((now - contacted).total_seconds() / 86400, 0.0)
+    recency = np.exp2(-days / RECENCY_HALF_LIFE_DAYS)
+
+    return np.column_stack([source, industry, senior, activity[:, 0], activity[:, 1], activity[:, 2], recency, campaign])
+
+
+def score_matrix(features: np.ndarray, statuses: List[Optional[str]]) -> np.ndarray:
+    """Integer scores 0-100 from a feature matrix"""
+    scores = np.rint(np.clip(features @ WEIGHTS, 0.0, 1.0) * 100).astype(int)
+    status_array = np.array(statuses, dtype=object)
+    scores[status_array == "disqualified"] = 0
+    scores[status_array == "converted"] = 100
+    return scores
+
+
+async def score_leads(db: AsyncIOMotorDatabase, leads: List[Dict]) -> np.ndarray:
+    """Scores for already-loaded lead documents (SCORING_PROJECTION fields)"""
+    if not leads:
+        return np.zeros(0, dtype=int)
+    industries = {lead["industry"] for lead in leads if lead.get("industry")}
+    campaigns = {lead["campaign_id"] for lead in leads if lead.get("campaign_id")}
+    activity_counts, industry_rates, campaign_rates = await asyncio.gather(
+        _activity_counts(db, [str(lead["_id"]) for lead in leads]),
+        _rates(db, "industry", industries),
+        _rates(db, "campaign_id", campaigns)
+    )
+    features = feature_matrix(leads, activity_counts, industry_rates, campaign_rates)
+    return score_matrix(features, [lead.get("status") for lead in leads])
+
+
+async def rescore(db: AsyncIOMotorDatabase, query: Dict) -> int:
+    """Rescore every lead matching query in one vectorized pass; returns how many scores changed"""
+    leads = await db.leads.find(query, SCORING_PROJECTION).to_list(length=None)
+    scores = await score_leads(db, leads)
+
+    updates = [
+        UpdateOne({"_id": lead["_id"]}, {"$set": {"score": int(score)}})
+        for lead, score in zip(leads, scores)
+        if lead.get("score") != score
+    ]
+    for start in range(0, len(updates), 1000):
+        await db.leads.bulk_write(updates[start:start + 1000], ordered=False)
+    return len(updates)
+
+
+async def rescore_campaign(db: AsyncIOMotorDatabase, campaign_id: str) -> int:
+    return await rescore(db, {"campaign_id": campaign_id, "is_deleted": False})
+
+
+async def rescore_leads(db: AsyncIOMotorDatabase, lead_ids: Iterable[str]) -> int:
+    oids = [ObjectId(lead_id) for lead_id in lead_ids if ObjectId.is_valid(lead_id)]
+    if not oids:
+        return 0
+    return await rescore(db, {"_id": {"$in": oids}, "is_deleted": False})
+
+
+class LeadScorer:
+    """Debounced background rescoring of leads that had new activity.
+
+    Writers call request(lead_id); pending ids are rescored together every
+    LEAD_SCORE_DEBOUNCE_MS, after the write-behind queue has flushed the
+    activity that triggered them.
+    """
+
+    def __init__(self):
+        self._pending: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.rescored = 0
+
+    def request(self, lead_id: str):
+        self._pending.add(str(lead_id))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.LEAD_SCORE_DEBOUNCE_MS / 1000)
+            if not self._pending:
+                continue
+            batch, self._pending = self._pending, set()
+            try:
+                self.rescored += await rescore_leads(get_db(), batch)
+            except Exception as e:
+                print(f"⚠️ Lead rescoring failed for {len(batch)} leads: {str(e)}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            batch, self._pending = self._pending, set()
+            try:
+                self.rescored += await rescore_leads(get_db(), batch)
+            except Exception as e:
+                print(f"⚠️ Lead rescoring failed for {len(batch)} leads: {str(e)}")
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "rescored": self.rescored,
+            "rate_cache": _rate_cache.stats()
+        }
+
+
+lead_scorer = LeadScorer()
+
+
+if __name__ == "__main__":
+    from app.database import connect_to_mongo, close_mongo_connection
+
+    async def rescore_all(batch_size: int = 10000):
+        await connect_to_mongo(with_indexes=False)
+        db = get_db()
+        changed = 0
+        last_id = None
+        try:
+            while True:
+                query = {"is_deleted": False}
+                if last_id is not None:
+                    query["_id"] = {"$gt": last_id}
+                ids = [doc["_id"] async for doc in db.leads.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+                if not ids:
+                    break
+                changed += await rescore(db, {"_id": {"$in": ids}})
+                last_id = ids[-1]
+            print(f"✅ Rescored leads, {changed} scores changed")
+        finally:
+            await close_mongo_connection()
+
+    asyncio.run(rescore_all())
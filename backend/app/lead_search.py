@@ -0,0 +1,132 @@
+"""Precomputed, index-backed lead search.
+
+Every lead stores normalized search fields next to its data:
+
+    search_email   lowercased email
+    search_phone   digits-only phone
+    search_words   normalized words of name, company and email
+    search_tokens  edge n-grams of those words and of the phone digits
+                   (multikey index ``live_search_tokens``)
+
+A query matches when every query term is one of the lead's n-grams, and
+results are ranked by exact email/phone/word hits.
+
+Run ``python -m app.lead_search`` from the backend directory to backfill
+leads created before these fields existed.
+"""
+from typing import Dict, List, Optional
+import re
+
+MIN_GRAM = 2
+MAX_GRAM = 15
+
+SEARCH_FIELDS = ("search_email", "search_phone", "search_words", "search_tokens")
+SEARCHABLE_SOURCE_FIELDS = ("name", "email", "phone", "company")
+
+# Projection that keeps the search fields out of API responses
+EXCLUDE_SEARCH_FIELDS = {field: 0 for field in SEARCH_FIELDS}
+
+_WORD_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def words(value: Optional[str]) -> List[str]:
+    """Lowercased alphanumeric words of value"""
+    if not value:
+        return []
+    return [w for w in _WORD_RE.split(value.lower()) if w and w != "_"]
+
+
+def digits(value: Optional[str]) -> str:
+    """Digits of value (phone normalization)"""
+    return "".join(c for c in value if c.isdigit()) if value else ""
+
+
+def edge_ngrams(token: str) -> List[str]:
+    return [token[:n] for n in range(MIN_GRAM, min(len(token), MAX_GRAM) + 1)]
+
+
+def search_fields(lead: Dict) -> Dict:
+    """Search fields for a lead document (call on create and whenever searchable fields change)"""
+    email = (lead.get("email") or "").lower()
+    phone = digits(lead.get("phone"))
+
+    lead_words = set(words(lead.get("name")) + words(lead.get("company")) + words(email))
+    tokens = set()
+    for word in lead_words:
+        tokens.update(edge_ngrams(word))
+    if phone:
+        tokens.update(edge_ngrams(phone))
+        # Also match national numbers typed without the country code
+        tokens.update(edge_ngrams(phone[-10:]))
+
+    return {
+        "search_email": email or None,
+        "search_phone": phone or None,
+        "search_words": sorted(lead_words),
+        "search_tokens": sorted(tokens)
+    }
+
+
+def search_terms(search: str) -> List[str]:
+    """Normalize a user query into terms comparable with search_tokens"""
+    if not re.search(r"[^\d\s+\-().]", search):
+        # Phone-looking input: one digits-only term
+        phone = digits(search)
+        return [phone[:MAX_GRAM]] if phone else []
+    return [w[:MAX_GRAM] for w in words(search)]
+
+
+def search_filter(search: str) -> Dict:
+    """Index-backed filter replacing the old four-field case-insensitive regex"""
+    terms = search_terms(search)
+    if not terms:
+        # Nothing searchable (blank or punctuation only) - no filter
+        return {}
+
+    clauses = []
+    for term in terms:
+        if len(term) >= MIN_GRAM:
+            clauses.append({"search_tokens": term})
+        else:
+            # Too short for a stored gram - anchored prefix still uses the index
+            clauses.append({"search_tokens": {"$regex": f"^{re.escape(term)}"}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def rank_stage(search: str) -> Dict:
+    """$addFields stage scoring exact email/phone matches and whole-word hits"""
+    terms = search_terms(search)
+    scores = [
+        {"$cond": [{"$eq": ["$search_email", search.strip().lower()]}, 100, 0]},
+        {"$multiply": [10, {"$size": {"$setIntersection": [{"$ifNull": ["$search_words", []]}, terms]}}]}
+    ]
+    phone = digits(search)
+    if phone:
+        scores.append({"$cond": [{"$eq": ["$search_phone", phone]}, 100, 0]})
+    return {"$addFields": {"_search_rank": {"$add": scores}}}
+
+
+if __name__ == "__main__":
+    import asyncio
+    from pymongo import UpdateOne
+    from app.database import connect_to_mongo, close_mongo_connection, get_db
+
+    async def backfill(batch_size: int = 1000):
+        await connect_to_mongo(with_indexes=False)
+        db = get_db()
+        updated = 0
+        batch = []
+        projection = {field: 1 for field in SEARCHABLE_SOURCE_FIELDS}
+        async for lead in db.leads.find({"search_tokens": {"$exists": False}}, projection):
+            batch.append(UpdateOne({"_id": lead["_id"]}, {"$set": search_fields(lead)}))
+            if len(batch) >= batch_size:
+                await db.leads.bulk_write(batch, ordered=False)
+                updated += len(batch)
+                batch = []
+        if batch:
+            await db.leads.bulk_write(batch, ordered=False)
+            updated += len(batch)
+        print(f"✅ Backfilled search fields on {updated} leads")
+        await close_mongo_connection()
+
+    asyncio.run(backfill())
@@ -0,0 +1,131 @@
+"""Single-lead write path: the lead insert and its side effects.
+
+A new lead produces up to four side-effect writes (CREATED activity,
+follow-up task, campaign counters, daily rollup). LEAD_WRITE_MODE picks how they run:
+
+    sequential   one after another (the original behaviour)
+    concurrent   issued together after the lead insert; latency is the
+                 slowest write rather than the sum
+    transaction  lead and side effects commit atomically in a session
+                 transaction; falls back to concurrent when the deployment
+                 is not a replica set or sharded cluster
+
+Outside transactions the campaign counters and the daily rollup go through
+their in-process aggregators (app.campaign_counters, app.lead_daily_stats)
+rather than a write per lead.
+Side-effect failures are logged, and in transaction mode they abort the
+whole write.
+"""
+from typing import Dict, Optional
+from functools import partial
+from bson.objectid import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.config import settings
+from app.lead_documents import created_activity, follow_up_task
+from app.campaign_counters import campaign_counters, new_lead_inc
+from app.lead_daily_stats import lead_daily_stats, rollup_key, key_filter
+from app.analytics_cache import analytics_cache
+import asyncio
+
+LEAD_WRITE_MODES = ("sequential", "concurrent", "transaction")
+
+_TRANSACTION_TOPOLOGIES = ("ReplicaSetWithPrimary", "Sharded")
+
+
+def supports_transactions(db: AsyncIOMotorDatabase) -> bool:
+    return db.client.topology_description.topology_type_name in _TRANSACTION_TOPOLOGIES
+
+
+def campaign_counter_update(lead_data: Dict) -> Optional[Dict]:
+    """$inc for the lead's campaign counters, or None without a valid campaign"""
+    campaign_id = lead_data.get("campaign_id")
+    if not campaign_id:
+        return None
+    if not ObjectId.is_valid(campaign_id):
+        print(f"⚠️ Lead {lead_data.get('_id')} has invalid campaign_id {campaign_id!r}, counters not updated")
+        return None
+    return {"$inc": dict(new_lead_inc(lead_data))}
+
+
+def _side_effects(db: AsyncIOMotorDatabase, lead_data: Dict, created_by: str, session=None):
+    """(name, write) pairs for every side effect of a new lead.
+
+    Writes are returned unstarted: Motor begins an operation as soon as the
+    method is called, so the caller decides when each one runs. Campaign
+    counters and the daily rollup are only written here inside a
+    transaction; otherwise they are handed to their aggregators.
+    """
+    writes = [("activity", partial(
+        db.lead_activities.insert_one, created_activity(lead_data, created_by), session=session
+    ))]
+    if lead_data.get("assigned_to"):
+        writes.append(("follow_up_task", partial(
+            db.tasks.insert_one, follow_up_task(lead_data, created_by), session=session
+        )))
+    if session is None:
+        campaign_counters.add(lead_data.get("campaign_id"), new_lead_inc(lead_data))
+        lead_daily_stats.add(lead_data)
+        return writes
+    counters = campaign_counter_update(lead_data)
+    if counters:
+        writes.append(("campaign_counters", partial(
+            db.campaigns.update_one, {"_id": ObjectId(lead_data["campaign_id"])}, counters, session=session
+        )))
+    key = rollup_key(lead_data)
+    if key is not None:
+        writes.append(("daily_stats", partial(
+            db.lead_daily_stats.update_one, key_filter(key), {"$inc": {"count": 1}}, upsert=True, session=session
+        )))
+    return writes
+
+
+async def _insert_sequential(db: AsyncIOMotorDatabase, lead_data: Dict, created_by: str):
+    await db.leads.insert_one(lead_data)
+    for name, write in _side_effects(db, lead_data, created_by):
+        try:
+            await write()
+        except Exception as e:
+            print(f"⚠️ Lead {lead_data['_id']} {name} write failed: {str(e)}")
+
+
+async def _insert_concurrent(db: AsyncIOMotorDatabase, lead_data: Dict, created_by: str):
+    await db.leads.insert_one(lead_data)
+    writes = _side_effects(db, lead_data, created_by)
+    results = await asyncio.gather(*(write() for _, write in writes), return_exceptions=True)
+    for (name, _), result in zip(writes, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ Lead {lead_data['_id']} {name} write failed: {str(result)}")
+
+
+async def _insert_transaction(db: AsyncIOMotorDatabase, lead_data: Dict, created_by: str):
+    # Operations on one session must not overlap, so writes inside the
+    # transaction are awaited in turn; the gain is atomicity, not latency.
+    async with await db.client.start_session() as session:
+        async with session.start_transaction():
+            await db.leads.insert_one(lead_data, session=session)
+            for _, write in _side_effects(db, lead_data, created_by, session=session):
+                await write()
+
+
+async def insert_lead(
+    db: AsyncIOMotorDatabase,
+    lead_data: Dict,
+    created_by: str,
+    mode: Optional[str] = None
+) -> str:
+    """Insert a built lead document and its side effects; returns the lead id"""
+    mode = mode or settings.LEAD_WRITE_MODE
+    if mode not in LEAD_WRITE_MODES:
+        raise ValueError(f"Unknown lead write mode: {mode}")
+    if mode == "transaction" and not supports_transactions(db):
+        mode = "concurrent"
+
+    lead_data.setdefault("_id", ObjectId())
+    if mode == "transaction":
+        await _insert_transaction(db, lead_data, created_by)
+    elif mode == "concurrent":
+        await _insert_concurrent(db, lead_data, created_by)
+    else:
+        await _insert_sequential(db, lead_data, created_by)
+    await analytics_cache.invalidate(lead_data.get("campaign_id"))
+    return str(lead_data["_id"])
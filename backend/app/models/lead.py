@@ -100,6 +100,7 @@ class Lead(LeadBase):
     score: int = 0
     disqualification_reason: Optional[DisqualificationReason] = None
     disqualification_notes: Optional[str] = None
+    duplicate_of: Optional[str] = None
     last_contacted_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
@@ -119,3 +120,9 @@ class LeadQualify(BaseModel):
 class LeadDisqualify(BaseModel):
     reason: DisqualificationReason
     notes: Optional[str] = None
+
+class LeadBulkStatus(BaseModel):
+    lead_ids: List[str]
+    status: LeadStatus
+    reason: Optional[DisqualificationReason] = None
+    notes: Optional[str] = None
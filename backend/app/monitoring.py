@@ -0,0 +1,229 @@
+from contextvars import ContextVar
+from collections import deque
+from typing import Optional, Dict, List
+from pymongo import monitoring
+from app.config import settings
+import asyncio
+import threading
+import time
+
+# Commands that can be explained with verbosity "queryPlanner"
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+
+# Session/transport fields that explain does not accept
+_COMMAND_ENVELOPE_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction"}
+
+
+class RequestDBStats:
+    """DB round trips and time spent by one HTTP request"""
+
+    __slots__ = ("endpoint", "round_trips", "db_time_ms")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.round_trips = 0
+        self.db_time_ms = 0.0
+
+
+current_request_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("current_request_stats", default=None)
+
+
+def summarize_plan(explain: Dict) -> Dict:
+    """Collect plan stages and index names from an explain result (rejected plans excluded)"""
+    stages: List[str] = []
+    indexes: List[str] = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "rejectedPlans":
+                    continue
+                if key == "stage" and isinstance(value, str):
+                    stages.append(value)
+                elif key == "indexName" and isinstance(value, str):
+                    indexes.append(value)
+                else:
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(explain)
+    return {
+        "stages": stages,
+        "indexes": sorted(set(indexes)),
+        "collscan": "COLLSCAN" in stages
+    }
+
+
+class DBCommandListener(monitoring.CommandListener):
+    """Attributes every Mongo command to the current request and captures slow ones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[tuple, tuple] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._explain_tasks = set()
+        self.endpoints: Dict[str, Dict] = {}
+        self.slow_queries = deque(maxlen=100)
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Loop used to run explain for slow commands"""
+        self._loop = loop
+
+    def started(self, event):
+        if event.command_name not in EXPLAINABLE_COMMANDS:
+            return
+        command = {
+            k: v for k, v in event.command.items()
+            if not k.startswith("$") and k not in _COMMAND_ENVELOPE_FIELDS
+        }
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (event.database_name, command)
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+    def _finished(self, event):
+        duration_ms = event.duration_micros / 1000
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+
+        stats = current_request_stats.get()
+        if stats is not None:
+            with self._lock:
+                stats.round_trips += 1
+                stats.db_time_ms += duration_ms
+
+        if pending is not None and duration_ms >= settings.SLOW_QUERY_MS:
+            database_name, command = pending
+            entry = {
+                "command": event.command_name,
+                "collection": command.get(event.command_name),
+                "duration_ms": round(duration_ms, 2),
+                "endpoint": stats.endpoint if stats else None,
+                "at": time.time(),
+                "plan": None
+            }
+            self.slow_queries.append(entry)
+            print(f"🐢 Slow {entry['command']} on {entry['collection']} ({entry['duration_ms']}ms) from {entry['endpoint']}")
+            if settings.SLOW_QUERY_EXPLAIN and self._loop is not None:
+                self._loop.call_soon_threadsafe(self._schedule_explain, entry, database_name, command)
+
+    def _schedule_explain(self, entry: Dict, database_name: str, command: Dict):
+        task = self._loop.create_task(self._explain(entry, database_name, command))
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    async def _explain(self, entry: Dict, database_name: str, command: Dict):
+        from app.database import client
+        try:
+            explain = await client[database_name].command(
+                {"explain": command, "verbosity": "queryPlanner"}
+            )
+        except Exception as e:
+            entry["plan"] = {"error": str(e)}
+            return
+
+        entry["plan"] = summarize_plan(explain)
+        if entry["plan"]["collscan"]:
+            print(f"⚠️ COLLSCAN: {entry['command']} on {entry['collection']} from {entry['endpoint']}")
+
+    def record_request(self, stats: RequestDBStats, duration_ms: float):
+        """Fold a finished request into the per-endpoint totals"""
+        with self._lock:
+            totals = self.endpoints.setdefault(stats.endpoint, {
+                "requests": 0,
+                "round_trips": 0,
+                "max_round_trips": 0,
+                "db_time_ms": 0.0,
+                "request_time_ms": 0.0
+            })
+            totals["requests"] += 1
+            totals["round_trips"] += stats.round_trips
+            totals["max_round_trips"] = max(totals["max_round_trips"], stats.round_trips)
+            totals["db_time_ms"] += stats.db_time_ms
+            totals["request_time_ms"] += duration_ms
+
+    def endpoint_report(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": t["requests"],
+                    "avg_round_trips": round(t["round_trips"] / t["requests"], 2),
+                    "max_round_trips": t["max_round_trips"],
+                    "avg_db_time_ms": round(t["db_time_ms"] / t["requests"], 2),
+                    "avg_request_time_ms": round(t["request_time_ms"] / t["requests"], 2)
+                }
+                for endpoint, t in self.endpoints.items()
+            }
+
+
+class PoolCheckoutListener(monitoring.ConnectionPoolListener):
+    """Connection pool checkout wait times and failures"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checked_out = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def connection_checked_out(self, event):
+        wait_ms = (event.duration or 0) * 1000
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    # Remaining pool events are not tracked
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checked_out": self.checked_out,
+                "avg_checkout_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_checkout_wait_ms": round(self.max_wait_ms, 3)
+            }
+
+
+command_listener = DBCommandListener()
+pool_listener = PoolCheckoutListener()
@@ -0,0 +1,67 @@
+from fastapi import HTTPException, status
+from bson.objectid import ObjectId
+from datetime import datetime
+from typing import Dict, List, Optional
+import base64
+import json
+
+# Newest first, _id breaks ties between leads created in the same millisecond
+KEYSET_SORT = [("created_at", -1), ("_id", -1)]
+
+# Highest score first, then newest
+SCORE_KEYSET_SORT = [("score", -1), ("created_at", -1), ("_id", -1)]
+
+# Sort field -> (cursor key, encode, decode)
+_CURSOR_FIELDS = {
+    "score": ("s", int, int),
+    "created_at": ("c", lambda v: v.isoformat(), datetime.fromisoformat),
+    "_id": ("i", str, ObjectId)
+}
+
+
+def encode_cursor(doc: Dict, sort: List = KEYSET_SORT) -> str:
+    """Opaque cursor pointing just after doc in sort order"""
+    raw = {}
+    for field, _ in sort:
+        key, encode, _ = _CURSOR_FIELDS[field]
+        # Leads scored before the score field existed sort as 0
+        raw[key] = encode(doc.get(field) or 0 if field == "score" else doc[field])
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: List = KEYSET_SORT) -> Dict:
+    """Range predicate selecting everything after the cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = {}
+        for field, _ in sort:
+            key, _, decode = _CURSOR_FIELDS[field]
+            values[field] = decode(raw[key])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    # (a < x) or (a == x and b < y) or ... for descending fields
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prefix: values[prefix] for prefix, _ in sort[:i]}
+        clause[field] = {"$lt" if direction < 0 else "$gt": values[field]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def apply_cursor(query: Dict, cursor: Optional[str], sort: List = KEYSET_SORT) -> Dict:
+    """AND the cursor predicate into query without clobbering an existing $or"""
+    if cursor:
+        query.setdefault("$and", []).append(decode_cursor(cursor, sort))
+    return query
+
+
+def next_cursor(docs: List[Dict], limit: int, sort: List = KEYSET_SORT) -> Optional[str]:
+    """Cursor for the following page, or None when this page was the last"""
+    if limit <= 0 or len(docs) < limit:
+        return None
+    return encode_cursor(docs[-1], sort)
@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict
+from app.config import settings
+from app.database import get_db
+import asyncio
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter used as a no-I/O pre-check for revoked keys"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def max_token_lifetime() -> timedelta:
+    """Longest lifetime create_access_token issues (expires_delta is capped to it)"""
+    minutes = max(settings.ACCESS_TOKEN_EXPIRE_MINUTES, settings.ACCESS_TOKEN_MAX_EXPIRE_MINUTES or 0)
+    return timedelta(minutes=minutes)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Mongo returns naive UTC datetimes"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class RevocationList:
+    """Per-worker mirror of the revoked_tokens collection.
+
+    Documents either revoke one token (jti) or every token of a user issued
+    before revoked_at (jti is None). The mirror is refreshed incrementally
+    from revoked_at, so the common "not revoked" check does no I/O.
+    """
+
+    def __init__(self):
+        self._bloom = BloomFilter(settings.REVOCATION_BLOOM_CAPACITY)
+        self._jtis: Dict[str, datetime] = {}
+        self._users: Dict[str, tuple] = {}
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self.rejections = 0
+        self.exact_lookups = 0
+
+    def _add(self, doc: Dict):
+        expires_at = _as_utc(doc["expires_at"])
+        revoked_at = _as_utc(doc["revoked_at"])
+        if doc.get("jti"):
+            self._jtis[doc["jti"]] = expires_at
+            self._bloom.add(f"jti:{doc['jti']}")
+        else:
+            current = self._users.get(doc["user_id"])
+            if current is None or current[0] < revoked_at:
+                self._users[doc["user_id"]] = (revoked_at, expires_at)
+            self._bloom.add(f"user:{doc['user_id']}")
+        if self._watermark is None or revoked_at > self._watermark:
+            self._watermark = revoked_at
+
+    def is_revoked(self, payload: Dict) -> bool:
+        """Check a verified token payload against the mirror"""
+        jti = payload.get("jti")
+        if jti and f"jti:{jti}" in self._bloom:
+            self.exact_lookups += 1
+            if jti in self._jtis:
+                self.rejections += 1
+                return True
+
+        user_id = payload.get("sub")
+        if user_id and f"user:{user_id}" in self._bloom:
+            self.exact_lookups += 1
+            entry = self._users.get(user_id)
+            if entry and self._issued_before(payload, entry[0]):
+                self.rejections += 1
+                return True
+
+        return False
+
+    @staticmethod
+    def _issued_before(payload: Dict, revoked_at: datetime) -> bool:
+        """Whether the token was issued no later than revoked_at"""
+        revoked_ms = int(revoked_at.timestamp() * 1000)
+        if "iat_ms" in payload:
+            # revoked_at is stored with millisecond precision: a token issued in
+            # the revocation's millisecond is revoked too
+            return payload["iat_ms"] <= revoked_ms
+        # Tokens issued before iat_ms existed only carry whole-second iat
+        return payload.get("iat", 0) * 1000 <= revoked_ms
+
+    async def revoke_token(self, payload: Dict):
+        """Revoke a single token until it would have expired anyway"""
+        doc = {
+            "jti": payload.get("jti"),
+            "user_id": payload.get("sub"),
+            "revoked_at": datetime.now(timezone.utc),
+            "expires_at": datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+        }
+        if not doc["jti"]:
+            return
+        await get_db().revoked_tokens.insert_one(doc)
+        self._add(doc)
+
+    async def revoke_user(self, user_id: str):
+        """Revoke every token issued to a user so far"""
+        now = datetime.now(timezone.utc)
+        doc = {
+            "jti": None,
+            "user_id": user_id,
+            "revoked_at": now,
+            # Outlive every token the user can still hold
+            "expires_at": now + max_token_lifetime()
+        }
+        await get_db().revoked_tokens.insert_one(doc)
+        self._add(doc)
+
+    def _prune(self):
+        """Forget expired entries and rebuild the filter from what is left"""
+        now = datetime.now(timezone.utc)
+        jtis = {k: v for k, v in self._jtis.items() if v > now}
+        users = {k: v for k, v in self._users.items() if v[1] > now}
+        if len(jtis) == len(self._jtis) and len(users) == len(self._users):
+            return
+
+        self._jtis, self._users = jtis, users
+        self._bloom = BloomFilter(settings.REVOCATION_BLOOM_CAPACITY)
+        for jti in jtis:
+            self._bloom.add(f"jti:{jti}")
+        for user_id in users:
+            self._bloom.add(f"user:{user_id}")
+
+    async def refresh(self):
+        """Pull revocations written since the last refresh (by any worker)"""
+        query = {"expires_at": {"$gt": datetime.now(timezone.utc)}}
+        if self._watermark is not None:
+            # Overlap the window so slow concurrent inserts are not missed
+            overlap = timedelta(seconds=settings.REVOCATION_REFRESH_SECONDS * 2)
+            query["revoked_at"] = {"$gt": self._watermark - overlap}
+
+        async for doc in get_db().revoked_tokens.find(query, {"_id": 0}):
+            self._add(doc)
+        self._prune()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.REVOCATION_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ Revocation list refresh failed: {str(e)}")
+
+    async def start(self):
+        """Load current revocations and keep refreshing in the background"""
+        await self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "revoked_tokens": len(self._jtis),
+            "revoked_users": len(self._users),
+            "bloom_bits": self._bloom.num_bits,
+            "bloom_hashes": self._bloom.num_hashes,
+            "exact_lookups": self.exact_lookups,
+            "rejections": self.rejections
+        }
+
+
+revocation_list = RevocationList()
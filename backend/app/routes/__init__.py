@@ -1,5 +1,5 @@
 """API Routes"""
-from . import auth, users, tasks, comments, notifications, activity_logs, leads, campaigns, lead_analytics
+from . import auth, users, tasks, comments, notifications, activity_logs, leads, campaigns, lead_analytics, metrics
 
 __all__ = [
     "auth",
@@ -10,5 +10,6 @@ __all__ = [
     "activity_logs",
     "leads",
     "campaigns",
-    "lead_analytics"
+    "lead_analytics",
+    "metrics"
 ]
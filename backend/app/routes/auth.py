@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Header
+from typing import Optional
 from datetime import datetime, timezone
 from app.models.user import UserCreate, UserResponse, LoginRequest, TokenResponse, UserRole
-from app.security import hash_password, verify_password, create_access_token
+from app.security import hash_password_async, verify_password_async, create_access_token, get_current_user_from_header
 from app.database import get_db
+from app.write_behind import write_behind
+from app.revocation import revocation_list
 from bson.objectid import ObjectId
 
 
 router = APIRouter()
 
+# Everything the login response needs, plus the hash to verify
+LOGIN_PROJECTION = {"hashed_password": 1, **{field: 1 for field in UserResponse.model_fields if field != "id"}}
+
 
 @router.post("/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 async def signup(request: UserCreate):
@@ -27,12 +33,14 @@ async def signup(request: UserCreate):
             detail="Username already taken"
         )
     
+    hashed_password = await hash_password_async(request.password)
+    
     user_data = {
         "email": request.email,
         "username": request.username,
         "first_name": request.first_name,
         "last_name": request.last_name,
-        "hashed_password": hash_password(request.password),
+        "hashed_password": hashed_password,
         "role": request.role.value,
         "department": getattr(request, 'department', None),  # ✅ Added department support
         "phone": getattr(request, 'phone', None),           # ✅ Added phone support
@@ -51,7 +59,7 @@ async def signup(request: UserCreate):
     
     access_token = create_access_token({"sub": user_data["_id"], "email": request.email})
 
-    await db.activity_logs.insert_one({
+    await write_behind.enqueue_insert("activity_logs", {
         "user_id": user_data["_id"],
         "action": "signup",
         "entity_type": "user",
@@ -70,7 +78,8 @@ async def signup(request: UserCreate):
 async def login(request: LoginRequest):
     db = get_db()
 
-    user = await db.users.find_one({"email": request.email, "is_deleted": False})
+    # ✅ One read on the critical path; last_login is stamped only after a successful login
+    user = await db.users.find_one({"email": request.email, "is_deleted": False}, LOGIN_PROJECTION)
     
     if not user:
         raise HTTPException(
@@ -78,7 +87,7 @@ async def login(request: LoginRequest):
             detail="Invalid email or password"
         )
 
-    if not verify_password(request.password, user.get("hashed_password", "")):
+    if not await verify_password_async(request.password, user.get("hashed_password", "")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -89,20 +98,16 @@ async def login(request: LoginRequest):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
-
-    # ✅ UPDATE last_login timestamp on successful login
-    current_time = datetime.now(timezone.utc)
-    await db.users.update_one(
-        {"_id": user["_id"]},
-        {"$set": {"last_login": current_time, "updated_at": current_time}}
-    )
     
+    current_time = datetime.now(timezone.utc)
+    user_id = user["_id"]
+
     # Update user dict with new last_login timestamp
     user["last_login"] = current_time
     user["updated_at"] = current_time
 
     # Convert ObjectId before using it
-    user["_id"] = str(user["_id"])
+    user["_id"] = str(user_id)
 
     access_token = create_access_token({
         "sub": user["_id"],
@@ -110,12 +115,17 @@ async def login(request: LoginRequest):
         "role": user.get("role")
     })
 
-    await db.activity_logs.insert_one({
+    await write_behind.enqueue_update(
+        "users",
+        {"_id": user_id},
+        {"$set": {"last_login": current_time, "updated_at": current_time}}
+    )
+    await write_behind.enqueue_insert("activity_logs", {
         "user_id": user["_id"],
         "action": "login",
         "entity_type": "user",
         "entity_id": user["_id"],
-        "created_at": datetime.now(timezone.utc)
+        "created_at": current_time
     })
 
     return TokenResponse(
@@ -125,20 +135,46 @@ async def login(request: LoginRequest):
     )
 
 
+@router.post("/logout")
+async def logout(authorization: Optional[str] = Header(None)):
+    current_user = get_current_user_from_header(authorization)
+    await revocation_list.revoke_token(current_user)
+    return {"message": "Logged out successfully"}
+
+
 @router.post("/refresh-token")
-async def refresh_token(request: dict):
+async def refresh_token(authorization: Optional[str] = Header(None)):
+    # The current token must still be valid and unrevoked
+    current_user = get_current_user_from_header(authorization)
+
     try:
-        if not request.get("user_id"):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Not authenticated"
-            )
-        
-        access_token = create_access_token({"sub": request.get("user_id")})
-        return {"access_token": access_token, "token_type": "bearer"}
-
-    except Exception:
+        user_id = ObjectId(current_user["sub"])
+    except:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Failed to refresh token"
+            detail="Invalid token"
         )
+
+    # Re-check the account: a deactivated or deleted user gets no new token
+    user = await get_db().users.find_one(
+        {"_id": user_id, "is_deleted": False},
+        {"email": 1, "role": 1, "is_active": 1}
+    )
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+
+    if not user.get("is_active", False):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+
+    access_token = create_access_token({
+        "sub": str(user["_id"]),
+        "email": user["email"],
+        "role": user.get("role")
+    })
+    return {"access_token": access_token, "token_type": "bearer"}
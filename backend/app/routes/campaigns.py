@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, status, Header
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Header, Response
+from typing import List, Literal, Optional
 from app.models.campaign import (
     Campaign,
     CampaignCreate,
@@ -8,29 +8,19 @@ from app.models.campaign import (
     DailyTargetUpdate,
     DailyTarget
 )
-from app.security import verify_token, get_token_from_header
+from app.security import get_current_user_from_header
 from app.database import get_db
+from app.analytics_cache import analytics_cache
+from app.pagination import KEYSET_SORT, SCORE_KEYSET_SORT, apply_cursor, next_cursor
+from app.lead_search import EXCLUDE_SEARCH_FIELDS
+from app.lead_dedup import DEDUP_FIELD
+from app.lead_scoring import rescore_campaign
+from app.campaign_counters import target_day
 from bson.objectid import ObjectId
 from datetime import datetime, date, timezone
 
 router = APIRouter()
 
-def get_current_user_from_header(authorization: Optional[str] = Header(None)):
-    """Extract and verify current user from Authorization header"""
-    token = get_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing or invalid authorization header"
-        )
-    
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    return payload
 
 @router.post("", response_model=CampaignResponse, status_code=status.HTTP_201_CREATED)
 async def create_campaign(
@@ -63,6 +53,7 @@ async def create_campaign(
     
     result = await db.campaigns.insert_one(campaign_data)
     campaign_data["_id"] = str(result.inserted_id)
+    await analytics_cache.invalidate(campaign_data["_id"])
     
     return CampaignResponse(**campaign_data)
 
@@ -163,6 +154,8 @@ async def update_campaign(
             detail="Campaign not found"
         )
     
+    await analytics_cache.invalidate(campaign_id)
+    
     updated_campaign = await db.campaigns.find_one({"_id": campaign_oid})
     updated_campaign["_id"] = str(updated_campaign["_id"])
     
@@ -204,6 +197,8 @@ async def delete_campaign(
             detail="Campaign not found"
         )
     
+    await analytics_cache.invalidate(campaign_id)
+    
     return {"message": "Campaign deleted successfully"}
 
 @router.put("/{campaign_id}/targets")
@@ -241,11 +236,12 @@ async def update_daily_target(
         )
     
     daily_targets = campaign.get("daily_targets", [])
+    target_date = target_day(request.date)
     
     # Find existing target for the date
     target_exists = False
     for i, target in enumerate(daily_targets):
-        if target["date"] == request.date:
+        if target["date"] == target_date:
             # Update existing target
             if request.data_target is not None:
                 daily_targets[i]["data_target"] = request.data_target
@@ -257,7 +253,7 @@ async def update_daily_target(
     if not target_exists:
         # Add new target
         new_target = {
-            "date": request.date,
+            "date": target_date,
             "data_target": request.data_target or 0,
             "calling_target": request.calling_target or 0,
             "data_achieved": 0,
@@ -273,6 +269,7 @@ async def update_daily_target(
         {"_id": campaign_oid},
         {"$set": {"daily_targets": daily_targets, "updated_at": datetime.now(timezone.utc)}}
     )
+    await analytics_cache.invalidate(campaign_id)
     
     return {"message": "Daily target updated successfully", "targets": daily_targets}
 
@@ -313,7 +310,7 @@ async def get_campaign_stats(
     lead_stats = await db.leads.aggregate(pipeline).to_list(length=None)
     
     # Get today's target
-    today = date.today()
+    today = target_day()
     today_target = None
     for target in campaign.get("daily_targets", []):
         if target["date"] == today:
@@ -336,24 +333,55 @@ async def get_campaign_stats(
 @router.get("/{campaign_id}/leads")
 async def get_campaign_leads(
     campaign_id: str,
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    sort: Literal["created_at", "score"] = "created_at",
     authorization: Optional[str] = Header(None)
 ):
-    """Get all leads for a specific campaign"""
+    """Get all leads for a specific campaign (keyset paginated via cursor / X-Next-Cursor)"""
     current_user = get_current_user_from_header(authorization)
     
     db = get_db()
     
-    leads = await db.leads.find(
-        {"campaign_id": campaign_id, "is_deleted": False}
-    ).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    keyset_sort = SCORE_KEYSET_SORT if sort == "score" else KEYSET_SORT
+    query = {"campaign_id": campaign_id, "is_deleted": False}
+    if cursor:
+        apply_cursor(query, cursor, keyset_sort)
+        skip = 0
+    
+    projection = {**EXCLUDE_SEARCH_FIELDS, DEDUP_FIELD: 0}
+    leads = await db.leads.find(query, projection).sort(keyset_sort).skip(skip).limit(limit).to_list(length=limit)
+    
+    cursor_for_next = next_cursor(leads, limit, keyset_sort)
+    if cursor_for_next:
+        response.headers["X-Next-Cursor"] = cursor_for_next
     
     for lead in leads:
         lead["_id"] = str(lead["_id"])
     
     return leads
 
+@router.post("/{campaign_id}/rescore")
+async def rescore_campaign_leads(
+    campaign_id: str,
+    authorization: Optional[str] = Header(None)
+):
+    """Recompute scores for every lead in a campaign"""
+    current_user = get_current_user_from_header(authorization)
+    
+    if current_user.get("role") not in ["admin", "manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and managers can rescore campaigns"
+        )
+    
+    db = get_db()
+    changed = await rescore_campaign(db, campaign_id)
+    
+    return {"message": "Campaign leads rescored", "changed": changed}
+
 @router.put("/{campaign_id}/achieved")
 async def update_achieved_target(
     campaign_id: str,
@@ -384,6 +412,7 @@ async def update_achieved_target(
     
     daily_targets = campaign.get("daily_targets", [])
     
+    target_date = target_day(target_date)
     for i, target in enumerate(daily_targets):
         if target["date"] == target_date:
             if data_achieved is not None:
@@ -396,5 +425,6 @@ async def update_achieved_target(
         {"_id": campaign_oid},
         {"$set": {"daily_targets": daily_targets, "updated_at": datetime.now(timezone.utc)}}
     )
+    await analytics_cache.invalidate(campaign_id)
     
     return {"message": "Achieved targets updated successfully"}
@@ -1,124 +1,88 @@
 from fastapi import APIRouter, HTTPException, status, Header, Query
-from typing import Optional
-from app.security import verify_token, get_token_from_header
+from typing import Optional, Literal
+from app.security import get_current_user_from_header
+from app.config import settings
 from app.database import get_db
-from datetime import datetime, timedelta, timezone, date
-from bson.objectid import ObjectId
+from app.user_directory import user_directory
+from app.models.campaign import CampaignStatus
+from app.campaign_counters import target_day
+from app.lead_overview import date_bounds, overview_match, overview_pipeline, legacy_trend, bucket_trend
+from app.lead_daily_stats import rollup_overview_pipeline, rollup_team_pipeline, localize_buckets
+from app.lead_funnel import FUNNEL_STAGES, funnel_counts
+from app.analytics_cache import analytics_cache, TARGETS_SCOPE
+from datetime import datetime, timedelta, date
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import asyncio
 
 router = APIRouter()
 
-def get_current_user_from_header(authorization: Optional[str] = Header(None)):
-    """Extract and verify current user from Authorization header"""
-    token = get_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing or invalid authorization header"
-        )
-    
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    return payload
+AnalyticsMode = Literal["live", "rollup"]
+
+
+def read_mode(mode: Optional[str]) -> str:
+    """live reads the leads collection, rollup reads lead_daily_stats"""
+    return mode or settings.ANALYTICS_READ_MODE
+
 
 @router.get("/leads/overview")
+@analytics_cache.cached("leads_overview", mode_param="mode")
 async def get_lead_analytics_overview(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    granularity: Optional[Literal["day", "week", "month"]] = None,
+    tz: Optional[str] = Query(None, alias="timezone"),
+    trend_format: Literal["legacy", "buckets"] = "legacy",
+    mode: Optional[AnalyticsMode] = None,
     authorization: Optional[str] = Header(None)
 ):
-    """Get overall lead analytics"""
+    """Get overall lead analytics (one $facet aggregation over the date range)"""
     current_user = get_current_user_from_header(authorization)
     
-    db = get_db()
+    db = get_db("analytics")
+    
+    granularity = granularity or settings.ANALYTICS_TREND_GRANULARITY
+    tz = tz or settings.ANALYTICS_TIMEZONE
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown timezone: {tz}"
+        )
     
     # Default to last 30 days if not specified
     if not end_date:
-        end_date = date.today()
+        end_date = datetime.now(zone).date()
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-    
-    # Total leads by status
-    status_pipeline = [
-        {"$match": {
-            "is_deleted": False,
-            "created_at": {"$gte": start_datetime, "$lte": end_datetime}
-        }},
-        {"$group": {
-            "_id": "$status",
-            "count": {"$sum": 1}
-        }}
-    ]
-    
-    status_breakdown = await db.leads.aggregate(status_pipeline).to_list(length=None)
-    
-    # Leads by source
-    source_pipeline = [
-        {"$match": {
-            "is_deleted": False,
-            "created_at": {"$gte": start_datetime, "$lte": end_datetime}
-        }},
-        {"$group": {
-            "_id": "$source",
-            "count": {"$sum": 1}
-        }}
-    ]
-    
-    source_breakdown = await db.leads.aggregate(source_pipeline).to_list(length=None)
-    
-    # Disqualification reasons
-    disqualification_pipeline = [
-        {"$match": {
-            "is_deleted": False,
-            "status": "disqualified",
-            "created_at": {"$gte": start_datetime, "$lte": end_datetime}
-        }},
-        {"$group": {
-            "_id": "$disqualification_reason",
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"count": -1}}
-    ]
-    
-    disqualification_reasons = await db.leads.aggregate(disqualification_pipeline).to_list(length=None)
-    
-    # Daily trend
-    daily_pipeline = [
-        {"$match": {
-            "is_deleted": False,
-            "created_at": {"$gte": start_datetime, "$lte": end_datetime}
-        }},
-        {"$group": {
-            "_id": {
-                "year": {"$year": "$created_at"},
-                "month": {"$month": "$created_at"},
-                "day": {"$dayOfMonth": "$created_at"}
-            },
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"_id": 1}}
-    ]
-    
-    daily_trend = await db.leads.aggregate(daily_pipeline).to_list(length=None)
-    
-    # Total counts
-    total_leads = await db.leads.count_documents({
-        "is_deleted": False,
-        "created_at": {"$gte": start_datetime, "$lte": end_datetime}
-    })
+    mode = read_mode(mode)
+    if mode == "rollup":
+        # Rollup days are fixed when leads are counted
+        if tz != settings.ANALYTICS_TIMEZONE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Rollups are kept in {settings.ANALYTICS_TIMEZONE}; use mode=live for other timezones"
+            )
+        pipeline = rollup_overview_pipeline(start_date, end_date, granularity)
+        result = (await db.lead_daily_stats.aggregate(pipeline).to_list(length=1))[0]
+        result["trend"] = localize_buckets(result["trend"], zone)
+    else:
+        start_datetime, end_datetime = date_bounds(start_date, end_date, zone)
+        pipeline = overview_pipeline(overview_match(start_datetime, end_datetime), granularity, tz)
+        result = (await db.leads.aggregate(pipeline).to_list(length=1))[0]
+    
+    trend = legacy_trend if trend_format == "legacy" else bucket_trend
     
     return {
-        "total_leads": total_leads,
-        "status_breakdown": status_breakdown,
-        "source_breakdown": source_breakdown,
-        "disqualification_reasons": disqualification_reasons,
-        "daily_trend": daily_trend,
+        "total_leads": result["total"][0]["count"] if result["total"] else 0,
+        "status_breakdown": result["status_breakdown"],
+        "source_breakdown": result["source_breakdown"],
+        "disqualification_reasons": result["disqualification_reasons"],
+        "daily_trend": trend(result["trend"], zone),
+        "granularity": granularity,
+        "timezone": tz,
+        "mode": mode,
         "date_range": {
             "start": start_date.isoformat(),
             "end": end_date.isoformat()
@@ -126,37 +90,64 @@ async def get_lead_analytics_overview(
     }
 
 @router.get("/campaigns/overview")
+@analytics_cache.cached("campaigns_overview", extra_scopes=(TARGETS_SCOPE,))
 async def get_campaign_analytics_overview(
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    campaign_status: Optional[CampaignStatus] = Query(None, alias="status"),
     authorization: Optional[str] = Header(None)
 ):
-    """Get overall campaign analytics"""
+    """Get overall campaign analytics (all matching campaigns unless limit is given)"""
     current_user = get_current_user_from_header(authorization)
     
-    db = get_db()
+    db = get_db("analytics")
     
-    # All active campaigns
-    campaigns = await db.campaigns.find({"is_deleted": False}).to_list(length=None)
+    query = {"is_deleted": False}
+    if campaign_status:
+        query["status"] = campaign_status.value
+    
+    # Only today's entry of daily_targets comes back, not the whole history
+    today = target_day()
+    projection = {
+        "name": 1,
+        "campaign_type": 1,
+        "status": 1,
+        "daily_targets": {"$elemMatch": {"date": today}}
+    }
+    cursor = db.campaigns.find(query, projection).sort([("created_at", -1), ("_id", -1)]).skip(skip)
+    if limit:
+        cursor = cursor.limit(limit)
+    campaigns, total_campaigns = await asyncio.gather(
+        cursor.to_list(length=limit),
+        db.campaigns.count_documents(query)
+    )
+    
+    # Lead counts for the whole page in one grouped aggregation
+    campaign_ids = [str(campaign["_id"]) for campaign in campaigns]
+    counts = {}
+    if campaign_ids:
+        pipeline = [
+            {"$match": {"campaign_id": {"$in": campaign_ids}, "is_deleted": False}},
+            {"$group": {"_id": {"campaign_id": "$campaign_id", "status": "$status"}, "count": {"$sum": 1}}}
+        ]
+        async for row in db.leads.aggregate(pipeline):
+            campaign_counts = counts.setdefault(row["_id"]["campaign_id"], {})
+            campaign_counts[row["_id"].get("status")] = row["count"]
     
     campaign_stats = []
     
     for campaign in campaigns:
         campaign_id = str(campaign["_id"])
+        campaign_counts = counts.get(campaign_id, {})
         
-        # Get lead counts
-        total_leads = await db.leads.count_documents({"campaign_id": campaign_id, "is_deleted": False})
-        qualified_leads = await db.leads.count_documents({"campaign_id": campaign_id, "status": "qualified", "is_deleted": False})
-        disqualified_leads = await db.leads.count_documents({"campaign_id": campaign_id, "status": "disqualified", "is_deleted": False})
+        total_leads = sum(campaign_counts.values())
+        qualified_leads = campaign_counts.get("qualified", 0)
+        disqualified_leads = campaign_counts.get("disqualified", 0)
         
         # Calculate conversion rate
         conversion_rate = (qualified_leads / total_leads * 100) if total_leads > 0 else 0
         
-        # Get today's progress
-        today = date.today()
-        today_target = None
-        for target in campaign.get("daily_targets", []):
-            if target["date"] == today:
-                today_target = target
-                break
+        targets = campaign.get("daily_targets") or []
         
         campaign_stats.append({
             "campaign_id": campaign_id,
@@ -167,18 +158,22 @@ async def get_campaign_analytics_overview(
             "qualified_leads": qualified_leads,
             "disqualified_leads": disqualified_leads,
             "conversion_rate": round(conversion_rate, 2),
-            "today_target": today_target
+            "today_target": targets[0] if targets else None
         })
     
     return {
         "campaigns": campaign_stats,
-        "total_campaigns": len(campaigns)
+        "total_campaigns": total_campaigns,
+        "skip": skip,
+        "limit": limit
     }
 
 @router.get("/team/performance")
+@analytics_cache.cached("team_performance", mode_param="mode")
 async def get_team_performance(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    mode: Optional[AnalyticsMode] = None,
     authorization: Optional[str] = Header(None)
 ):
     """Get team member performance metrics"""
@@ -191,48 +186,50 @@ async def get_team_performance(
             detail="Only admins and managers can view team performance"
         )
     
-    db = get_db()
+    db = get_db("analytics")
     
-    # Default to last 30 days
+    # Default to the last 30 days of ANALYTICS_TIMEZONE
     if not end_date:
-        end_date = date.today()
+        end_date = datetime.now(ZoneInfo(settings.ANALYTICS_TIMEZONE)).date()
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-    
-    # Performance by team member
-    pipeline = [
-        {"$match": {
-            "is_deleted": False,
-            "created_at": {"$gte": start_datetime, "$lte": end_datetime},
-            "assigned_to": {"$exists": True, "$ne": None}
-        }},
-        {"$group": {
-            "_id": "$assigned_to",
-            "total_leads": {"$sum": 1},
-            "qualified": {"$sum": {"$cond": [{"$eq": ["$status", "qualified"]}, 1, 0]}},
-            "disqualified": {"$sum": {"$cond": [{"$eq": ["$status", "disqualified"]}, 1, 0]}},
-            "contacted": {"$sum": {"$cond": [{"$eq": ["$status", "contacted"]}, 1, 0]}}
-        }},
-        {"$sort": {"total_leads": -1}}
-    ]
-    
-    team_performance = await db.leads.aggregate(pipeline).to_list(length=None)
+    mode = read_mode(mode)
+    if mode == "rollup":
+        team_performance = await db.lead_daily_stats.aggregate(
+            rollup_team_pipeline(start_date, end_date)
+        ).to_list(length=None)
+    else:
+        # Whole days in ANALYTICS_TIMEZONE, matching the rollup's dates
+        start_datetime, end_datetime = date_bounds(start_date, end_date, ZoneInfo(settings.ANALYTICS_TIMEZONE))
+        
+        # Performance by team member
+        pipeline = [
+            {"$match": {
+                "is_deleted": False,
+                "created_at": {"$gte": start_datetime, "$lt": end_datetime},
+                "assigned_to": {"$exists": True, "$ne": None}
+            }},
+            {"$group": {
+                "_id": "$assigned_to",
+                "total_leads": {"$sum": 1},
+                "qualified": {"$sum": {"$cond": [{"$eq": ["$status", "qualified"]}, 1, 0]}},
+                "disqualified": {"$sum": {"$cond": [{"$eq": ["$status", "disqualified"]}, 1, 0]}},
+                "contacted": {"$sum": {"$cond": [{"$eq": ["$status", "contacted"]}, 1, 0]}}
+            }},
+            {"$sort": {"total_leads": -1}}
+        ]
+        
+        team_performance = await db.leads.aggregate(pipeline).to_list(length=None)
     
-    # Enrich with user details
+    # Enrich with user details (one batched lookup for the whole team)
+    users = await user_directory.resolve(p["_id"] for p in team_performance)
     for performance in team_performance:
-        user_id = performance["_id"]
-        try:
-            user = await db.users.find_one({"_id": ObjectId(user_id)})
-            if user:
-                performance["user_name"] = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
-                performance["user_email"] = user.get("email")
-            else:
-                performance["user_name"] = "Unknown User"
-                performance["user_email"] = ""
-        except:
+        user = users.get(str(performance["_id"]))
+        if user:
+            performance["user_name"] = user["name"]
+            performance["user_email"] = user["email"]
+        else:
             performance["user_name"] = "Unknown User"
             performance["user_email"] = ""
         
@@ -244,6 +241,7 @@ async def get_team_performance(
     
     return {
         "team_performance": team_performance,
+        "mode": mode,
         "date_range": {
             "start": start_date.isoformat(),
             "end": end_date.isoformat()
@@ -251,36 +249,40 @@ async def get_team_performance(
     }
 
 @router.get("/conversion-funnel")
+@analytics_cache.cached("conversion_funnel", scope_param="campaign_id", mode_param="mode")
 async def get_conversion_funnel(
     campaign_id: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    mode: Optional[AnalyticsMode] = None,
     authorization: Optional[str] = Header(None)
 ):
-    """Get conversion funnel data"""
+    """Get conversion funnel data (optionally for leads created in a date window)"""
     current_user = get_current_user_from_header(authorization)
     
-    db = get_db()
+    db = get_db("analytics")
     
-    query = {"is_deleted": False}
-    if campaign_id:
-        query["campaign_id"] = campaign_id
-    
-    # Count leads at each stage
-    new_leads = await db.leads.count_documents({**query, "status": "new"})
-    contacted = await db.leads.count_documents({**query, "status": "contacted"})
-    qualified = await db.leads.count_documents({**query, "status": "qualified"})
-    converted = await db.leads.count_documents({**query, "status": "converted"})
-    disqualified = await db.leads.count_documents({**query, "status": "disqualified"})
+    mode = read_mode(mode)
+    counts = await funnel_counts(db, mode, campaign_id, assigned_to, start_date, end_date)
     
-    total = new_leads + contacted + qualified + converted + disqualified
+    total = sum(counts.get(stage, 0) for stage, _ in FUNNEL_STAGES)
     
     return {
         "funnel": [
-            {"stage": "New Leads", "count": new_leads, "percentage": round((new_leads / total * 100) if total > 0 else 0, 2)},
-            {"stage": "Contacted", "count": contacted, "percentage": round((contacted / total * 100) if total > 0 else 0, 2)},
-            {"stage": "Qualified", "count": qualified, "percentage": round((qualified / total * 100) if total > 0 else 0, 2)},
-            {"stage": "Converted", "count": converted, "percentage": round((converted / total * 100) if total > 0 else 0, 2)},
-            {"stage": "Disqualified", "count": disqualified, "percentage": round((disqualified / total * 100) if total > 0 else 0, 2)}
+            {
+                "stage": label,
+                "count": counts.get(stage, 0),
+                "percentage": round((counts.get(stage, 0) / total * 100) if total > 0 else 0, 2)
+            }
+            for stage, label in FUNNEL_STAGES
         ],
         "total_leads": total,
-        "campaign_id": campaign_id
+        "campaign_id": campaign_id,
+        "assigned_to": assigned_to,
+        "date_range": {
+            "start": start_date.isoformat() if start_date else None,
+            "end": end_date.isoformat() if end_date else None
+        },
+        "mode": mode
     }
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, status, Header, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Header, Query, Response, UploadFile, File, Form, BackgroundTasks
+from typing import List, Literal, Optional
 from app.models.lead import (
     Lead,
     LeadCreate,
@@ -8,32 +8,48 @@ from app.models.lead import (
     LeadStatus,
     LeadSource,
     LeadQualify,
-    LeadDisqualify
+    LeadDisqualify,
+    LeadBulkStatus
 )
 from app.models.lead_activity import LeadActivityCreate, ActivityType
-from app.security import verify_token, get_token_from_header
+from app.security import get_current_user_from_header
 from app.database import get_db
+from app.write_behind import write_behind
+from app.pagination import KEYSET_SORT, SCORE_KEYSET_SORT, apply_cursor, next_cursor
+from app.lead_scoring import lead_scorer
+from app.lead_documents import build_lead_document
+from app.lead_writes import insert_lead
+from app.lead_import import import_leads
+from app.lead_dedup import DuplicateDetector, dedup_keys, DEDUP_FIELD, DEDUP_SOURCE_FIELDS
+from app.lead_file_import import SUPPORTED_EXTENSIONS, file_extension, save_upload, create_job, run_import_job
+from app.campaign_counters import campaign_counters, status_change_inc
+from app.lead_daily_stats import lead_daily_stats, ROLLUP_PROJECTION
+from app.analytics_cache import analytics_cache
+from app.lead_search import (
+    search_fields,
+    search_filter,
+    rank_stage,
+    EXCLUDE_SEARCH_FIELDS,
+    SEARCHABLE_SOURCE_FIELDS
+)
 from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
 from datetime import datetime, timezone
 
 router = APIRouter()
 
-def get_current_user_from_header(authorization: Optional[str] = Header(None)):
-    """Extract and verify current user from Authorization header"""
-    token = get_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing or invalid authorization header"
-        )
-    
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    return payload
+# Pre-update fields needed for status-change side effects
+STATUS_CHANGE_PROJECTION = {"status": 1, "campaign_id": 1, "source": 1, **ROLLUP_PROJECTION}
+
+MAX_BULK_STATUS_LEADS = 1000
+
+STATUS_ACTIVITY_TYPES = {
+    LeadStatus.QUALIFIED.value: ActivityType.QUALIFIED,
+    LeadStatus.DISQUALIFIED.value: ActivityType.DISQUALIFIED,
+    LeadStatus.CONVERTED.value: ActivityType.CONVERTED
+}
+
 
 @router.post("", response_model=LeadResponse, status_code=status.HTTP_201_CREATED)
 async def create_lead(
@@ -44,65 +60,46 @@ async def create_lead(
     current_user = get_current_user_from_header(authorization)
     
     db = get_db()
-    lead_data = request.dict()
-    lead_data["created_by"] = current_user.get("sub")
-    lead_data["status"] = lead_data.get("status", LeadStatus.NEW).value if hasattr(lead_data.get("status"), "value") else lead_data.get("status", "new")
-    lead_data["source"] = lead_data.get("source").value if hasattr(lead_data.get("source"), "value") else lead_data.get("source")
-    lead_data["created_at"] = datetime.now(timezone.utc)
-    lead_data["updated_at"] = datetime.now(timezone.utc)
-    lead_data["is_deleted"] = False
-    lead_data["score"] = 0
-    
-    result = await db.leads.insert_one(lead_data)
-    lead_data["_id"] = str(result.inserted_id)
+    lead_data = build_lead_document(request, current_user.get("sub"))
     
-    # Log activity
-    activity = {
-        "lead_id": str(result.inserted_id),
-        "activity_type": ActivityType.CREATED.value,
-        "description": f"Lead created from {lead_data['source']}",
-        "performed_by": current_user.get("sub"),
-        "metadata": {"source": lead_data['source']},
-        "created_at": datetime.now(timezone.utc)
-    }
-    await db.lead_activities.insert_one(activity)
-    
-    # Auto-create follow-up task if assigned
-    if lead_data.get("assigned_to"):
-        task_data = {
-            "title": f"Follow up: {lead_data['name']}",
-            "description": f"Contact lead {lead_data['name']} from {lead_data['source']} source\nCompany: {lead_data.get('company', 'N/A')}\nPhone: {lead_data.get('phone', 'N/A')}\nEmail: {lead_data.get('email', 'N/A')}",
-            "assigned_to": lead_data.get("assigned_to"),
-            "created_by": current_user.get("sub"),
-            "status": "todo",
-            "priority": "medium",
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc),
-            "is_deleted": False,
-            "time_logged": 0,
-            "tags": ["lead-followup"],
-            "lead_id": str(result.inserted_id)
-        }
-        await db.tasks.insert_one(task_data)
+    # Flags (and per LEAD_DUPLICATE_POLICY disqualifies) repeats of an existing lead
+    await DuplicateDetector(db).check([lead_data])
     
-    # Update campaign stats if campaign_id exists
-    if lead_data.get("campaign_id"):
-        await update_campaign_lead_count(db, lead_data["campaign_id"], lead_data["source"])
+    # Lead insert, then activity log, follow-up task and campaign counters (LEAD_WRITE_MODE)
+    try:
+        lead_data["_id"] = await insert_lead(db, lead_data, current_user.get("sub"))
+    except PyMongoError as e:
+        print(f"❌ Lead creation failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create lead"
+        )
+    
+    lead_scorer.request(lead_data["_id"])
     
     return LeadResponse(**lead_data)
 
 @router.get("", response_model=List[LeadResponse])
 async def list_leads(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     status: Optional[str] = None,
     source: Optional[str] = None,
     campaign_id: Optional[str] = None,
     assigned_to: Optional[str] = None,
     search: Optional[str] = None,
+    sort: Literal["created_at", "score"] = "created_at",
     authorization: Optional[str] = Header(None)
 ):
-    """List leads with filtering"""
+    """List leads with filtering.
+
+    ``sort=score`` lists the highest scored leads first (search results are
+    always ranked by relevance). Pass the X-Next-Cursor response header back
+    as ``cursor`` for the next page; ``skip`` still works but gets slower on
+    deep pages.
+    """
     current_user = get_current_user_from_header(authorization)
     
     db = get_db()
@@ -117,20 +114,37 @@ async def list_leads(
     if assigned_to:
         query["assigned_to"] = assigned_to
     
-    # Search by name, email, phone, or company
-    if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"email": {"$regex": search, "$options": "i"}},
-            {"phone": {"$regex": search, "$options": "i"}},
-            {"company": {"$regex": search, "$options": "i"}}
-        ]
-    
     # For employees, only show their assigned leads
     if current_user.get("role") == "employee":
         query["assigned_to"] = current_user.get("sub")
     
-    leads = await db.leads.find(query).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    # Search by name, email, phone, or company (ranked, served by the search_tokens index)
+    if search:
+        query.update(search_filter(search))
+        leads = await db.leads.aggregate([
+            {"$match": query},
+            rank_stage(search),
+            {"$sort": {"_search_rank": -1, "created_at": -1, "_id": -1}},
+            {"$skip": skip},
+            {"$limit": limit},
+            {"$project": {**EXCLUDE_SEARCH_FIELDS, "_search_rank": 0}}
+        ]).to_list(length=limit)
+        
+        for lead in leads:
+            lead["_id"] = str(lead["_id"])
+        
+        return [LeadResponse(**lead) for lead in leads]
+    
+    keyset_sort = SCORE_KEYSET_SORT if sort == "score" else KEYSET_SORT
+    if cursor:
+        apply_cursor(query, cursor, keyset_sort)
+        skip = 0
+    
+    leads = await db.leads.find(query, EXCLUDE_SEARCH_FIELDS).sort(keyset_sort).skip(skip).limit(limit).to_list(length=limit)
+    
+    cursor_for_next = next_cursor(leads, limit, keyset_sort)
+    if cursor_for_next:
+        response.headers["X-Next-Cursor"] = cursor_for_next
     
     for lead in leads:
         lead["_id"] = str(lead["_id"])
@@ -190,14 +204,6 @@ async def update_lead(
             detail="Invalid lead ID"
         )
     
-    # Get original lead
-    original_lead = await db.leads.find_one({"_id": lead_oid})
-    if not original_lead:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Lead not found"
-        )
-    
     update_data = request.dict(exclude_unset=True, exclude_none=True)
     
     # Convert enums to values
@@ -206,22 +212,52 @@ async def update_lead(
     if "source" in update_data and hasattr(update_data["source"], "value"):
         update_data["source"] = update_data["source"].value
     
+    updated_fields = list(update_data)
     update_data["updated_at"] = datetime.now(timezone.utc)
     
-    await db.leads.update_one({"_id": lead_oid}, {"$set": update_data})
+    # One round trip: the pre-update document plus our $set is the new state
+    original_lead = await db.leads.find_one_and_update(
+        {"_id": lead_oid},
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not original_lead:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lead not found"
+        )
+    
+    updated_lead = {**original_lead, **update_data}
+    lead_daily_stats.move(original_lead, updated_lead)
+    await analytics_cache.invalidate(original_lead.get("campaign_id"), updated_lead.get("campaign_id"))
+    
+    # Search fields and dedup keys derive from the whole lead, so they are
+    # written afterwards, guarded on the values they were derived from
+    derived = {}
+    if any(field in update_data for field in SEARCHABLE_SOURCE_FIELDS):
+        derived.update(search_fields(updated_lead))
+    if any(field in update_data for field in DEDUP_SOURCE_FIELDS):
+        derived[DEDUP_FIELD] = dedup_keys(updated_lead)
+    if derived:
+        source_fields = set(SEARCHABLE_SOURCE_FIELDS) | set(DEDUP_SOURCE_FIELDS)
+        await write_behind.enqueue_update(
+            "leads",
+            {"_id": lead_oid, **{field: updated_lead.get(field) for field in source_fields}},
+            {"$set": derived}
+        )
     
     # Log activity
-    activity = {
+    await write_behind.enqueue_insert("lead_activities", {
         "lead_id": lead_id,
         "activity_type": ActivityType.UPDATED.value,
         "description": "Lead information updated",
         "performed_by": current_user.get("sub"),
-        "metadata": {"updated_fields": list(update_data.keys())},
+        "metadata": {"updated_fields": updated_fields},
         "created_at": datetime.now(timezone.utc)
-    }
-    await db.lead_activities.insert_one(activity)
+    })
+    
+    lead_scorer.request(lead_id)
     
-    updated_lead = await db.leads.find_one({"_id": lead_oid})
     updated_lead["_id"] = str(updated_lead["_id"])
     
     return LeadResponse(**updated_lead)
@@ -251,17 +287,21 @@ async def delete_lead(
             detail="Invalid lead ID"
         )
     
-    result = await db.leads.update_one(
-        {"_id": lead_oid},
-        {"$set": {"is_deleted": True, "updated_at": datetime.now(timezone.utc)}}
+    lead = await db.leads.find_one_and_update(
+        {"_id": lead_oid, "is_deleted": False},
+        {"$set": {"is_deleted": True, "updated_at": datetime.now(timezone.utc)}},
+        projection=ROLLUP_PROJECTION
     )
     
-    if result.modified_count == 0:
+    if not lead:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lead not found"
         )
     
+    lead_daily_stats.add(lead, -1)
+    await analytics_cache.invalidate(lead.get("campaign_id"))
+    
     return {"message": "Lead deleted successfully"}
 
 @router.put("/{lead_id}/qualify")
@@ -282,38 +322,48 @@ async def qualify_lead(
             detail="Invalid lead ID"
         )
     
-    lead = await db.leads.find_one({"_id": lead_oid})
-    if not lead:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Lead not found"
-        )
-    
+    now = datetime.now(timezone.utc)
     update_data = {
         "status": LeadStatus.QUALIFIED.value,
-        "updated_at": datetime.now(timezone.utc),
-        "last_contacted_at": datetime.now(timezone.utc)
+        "updated_at": now,
+        "last_contacted_at": now
     }
     
     if request.notes:
-        update_data["notes"] = lead.get("notes", "") + f"\n[Qualified] {request.notes}"
+        # Appended server-side, so concurrent note edits are not lost
+        update_data["notes"] = {"$concat": [
+            {"$ifNull": ["$notes", ""]},
+            {"$literal": f"\n[Qualified] {request.notes}"}
+        ]}
     
-    await db.leads.update_one({"_id": lead_oid}, {"$set": update_data})
+    lead = await db.leads.find_one_and_update(
+        {"_id": lead_oid},
+        [{"$set": update_data}],
+        projection=STATUS_CHANGE_PROJECTION,
+        return_document=ReturnDocument.BEFORE
+    )
+    if not lead:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lead not found"
+        )
     
     # Log activity
-    activity = {
+    await write_behind.enqueue_insert("lead_activities", {
         "lead_id": lead_id,
         "activity_type": ActivityType.QUALIFIED.value,
         "description": f"Lead qualified{': ' + request.notes if request.notes else ''}",
         "performed_by": current_user.get("sub"),
         "metadata": {"notes": request.notes},
-        "created_at": datetime.now(timezone.utc)
-    }
-    await db.lead_activities.insert_one(activity)
+        "created_at": now
+    })
     
-    # Update campaign stats
-    if lead.get("campaign_id"):
-        await update_campaign_qualified_count(db, lead["campaign_id"], lead["source"])
+    # Update campaign stats (once per transition, not per repeated call)
+    campaign_counters.add(lead.get("campaign_id"), status_change_inc(lead.get("status"), LeadStatus.QUALIFIED.value, lead.get("source")))
+    lead_daily_stats.move(lead, {**lead, "status": LeadStatus.QUALIFIED.value})
+    await analytics_cache.invalidate(lead.get("campaign_id"))
+    
+    lead_scorer.request(lead_id)
     
     return {"message": "Lead qualified successfully"}
 
@@ -335,37 +385,43 @@ async def disqualify_lead(
             detail="Invalid lead ID"
         )
     
-    lead = await db.leads.find_one({"_id": lead_oid})
-    if not lead:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Lead not found"
-        )
-    
+    now = datetime.now(timezone.utc)
     update_data = {
         "status": LeadStatus.DISQUALIFIED.value,
         "disqualification_reason": request.reason.value,
         "disqualification_notes": request.notes,
-        "updated_at": datetime.now(timezone.utc),
-        "last_contacted_at": datetime.now(timezone.utc)
+        "updated_at": now,
+        "last_contacted_at": now
     }
     
-    await db.leads.update_one({"_id": lead_oid}, {"$set": update_data})
+    lead = await db.leads.find_one_and_update(
+        {"_id": lead_oid},
+        {"$set": update_data},
+        projection=STATUS_CHANGE_PROJECTION,
+        return_document=ReturnDocument.BEFORE
+    )
+    if not lead:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lead not found"
+        )
     
     # Log activity
-    activity = {
+    await write_behind.enqueue_insert("lead_activities", {
         "lead_id": lead_id,
         "activity_type": ActivityType.DISQUALIFIED.value,
         "description": f"Lead disqualified: {request.reason.value}",
         "performed_by": current_user.get("sub"),
         "metadata": {"reason": request.reason.value, "notes": request.notes},
-        "created_at": datetime.now(timezone.utc)
-    }
-    await db.lead_activities.insert_one(activity)
+        "created_at": now
+    })
     
-    # Update campaign stats
-    if lead.get("campaign_id"):
-        await update_campaign_disqualified_count(db, lead["campaign_id"], lead["source"])
+    # Update campaign stats (once per transition, not per repeated call)
+    campaign_counters.add(lead.get("campaign_id"), status_change_inc(lead.get("status"), LeadStatus.DISQUALIFIED.value, lead.get("source")))
+    lead_daily_stats.move(lead, {**lead, **update_data})
+    await analytics_cache.invalidate(lead.get("campaign_id"))
+    
+    lead_scorer.request(lead_id)
     
     return {"message": "Lead disqualified successfully"}
 
@@ -401,85 +457,192 @@ async def bulk_import_leads(
         )
     
     db = get_db()
-    created_leads = []
-    
-    for lead_data in leads:
-        lead_dict = lead_data.dict()
-        lead_dict["created_by"] = current_user.get("sub")
-        lead_dict["status"] = lead_dict.get("status", LeadStatus.NEW).value if hasattr(lead_dict.get("status"), "value") else lead_dict.get("status", "new")
-        lead_dict["source"] = lead_dict.get("source").value if hasattr(lead_dict.get("source"), "value") else lead_dict.get("source")
-        lead_dict["created_at"] = datetime.now(timezone.utc)
-        lead_dict["updated_at"] = datetime.now(timezone.utc)
-        lead_dict["is_deleted"] = False
-        lead_dict["score"] = 0
-        
-        result = await db.leads.insert_one(lead_dict)
-        lead_dict["_id"] = str(result.inserted_id)
-        created_leads.append(lead_dict)
-        
-        # Update campaign stats if campaign_id exists
-        if lead_dict.get("campaign_id"):
-            await update_campaign_lead_count(db, lead_dict["campaign_id"], lead_dict["source"])
-    
-    return {"message": f"{len(created_leads)} leads imported successfully", "leads": created_leads}
+    result = await import_leads(db, leads, current_user.get("sub"))
+    imported = len(result["inserted_ids"])
+    
+    return {
+        "message": f"{imported} leads imported successfully",
+        "imported": imported,
+        "duplicates": len(result["duplicates"]),
+        "failed": len(result["errors"]),
+        "lead_ids": result["inserted_ids"],
+        "duplicate_leads": result["duplicates"],
+        "errors": result["errors"]
+    }
 
-# Helper functions
-async def update_campaign_lead_count(db, campaign_id: str, source: str):
-    """Increment campaign lead count"""
-    try:
-        await db.campaigns.update_one(
-            {"_id": ObjectId(campaign_id)},
-            {"$inc": {"total_leads": 1}}
+@router.post("/bulk-status")
+async def bulk_update_lead_status(
+    request: LeadBulkStatus,
+    authorization: Optional[str] = Header(None)
+):
+    """Move many leads to one status"""
+    current_user = get_current_user_from_header(authorization)
+    
+    if current_user.get("role") not in ["admin", "manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and managers can bulk update leads"
         )
-    except:
-        pass
+    
+    if not request.lead_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No leads given"
+        )
+    if len(request.lead_ids) > MAX_BULK_STATUS_LEADS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_STATUS_LEADS} leads can be updated per request"
+        )
+    
+    target_status = request.status.value
+    if target_status == LeadStatus.DISQUALIFIED.value and not request.reason:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A disqualification reason is required"
+        )
+    
+    invalid_ids = [lead_id for lead_id in request.lead_ids if not ObjectId.is_valid(lead_id)]
+    lead_oids = list({ObjectId(lead_id) for lead_id in request.lead_ids if ObjectId.is_valid(lead_id)})
+    
+    db = get_db()
+    leads = await db.leads.find(
+        {"_id": {"$in": lead_oids}, "is_deleted": False},
+        STATUS_CHANGE_PROJECTION
+    ).to_list(length=len(lead_oids))
+    
+    found = {lead["_id"] for lead in leads}
+    not_found = [str(oid) for oid in lead_oids if oid not in found]
+    unchanged = [str(lead["_id"]) for lead in leads if lead.get("status") == target_status]
+    changing = [lead for lead in leads if lead.get("status") != target_status]
+    
+    now = datetime.now(timezone.utc)
+    update_data = {"status": target_status, "updated_at": now}
+    if target_status in (LeadStatus.QUALIFIED.value, LeadStatus.DISQUALIFIED.value):
+        update_data["last_contacted_at"] = now
+    if target_status == LeadStatus.DISQUALIFIED.value:
+        update_data["disqualification_reason"] = request.reason.value
+        update_data["disqualification_notes"] = request.notes
+    
+    # Guarded on the status we read, so a lead changed meanwhile is not counted twice
+    if changing:
+        result = await db.leads.bulk_write([
+            UpdateOne({"_id": lead["_id"], "status": lead.get("status")}, {"$set": update_data})
+            for lead in changing
+        ], ordered=False)
+        if result.modified_count < len(changing):
+            applied = {
+                lead["_id"] async for lead in db.leads.find(
+                    {"_id": {"$in": [lead["_id"] for lead in changing]}, "status": target_status, "updated_at": now},
+                    {"_id": 1}
+                )
+            }
+            changing = [lead for lead in changing if lead["_id"] in applied]
+    
+    activity_type = STATUS_ACTIVITY_TYPES.get(target_status, ActivityType.STATUS_CHANGED)
+    activities = [
+        {
+            "lead_id": str(lead["_id"]),
+            "activity_type": activity_type.value,
+            "description": f"Lead status changed from {lead.get('status')} to {target_status}"
+                           + (f": {request.reason.value}" if target_status == LeadStatus.DISQUALIFIED.value else ""),
+            "performed_by": current_user.get("sub"),
+            "metadata": {
+                "previous_status": lead.get("status"),
+                "reason": request.reason.value if request.reason else None,
+                "notes": request.notes,
+                "bulk": True
+            },
+            "created_at": now
+        }
+        for lead in changing
+    ]
+    
+    if activities:
+        await db.lead_activities.insert_many(activities, ordered=False)
+    
+    # Merged by the aggregators (one $inc per campaign / rollup key per flush)
+    for lead in changing:
+        campaign_counters.add(lead.get("campaign_id"), status_change_inc(lead.get("status"), target_status, lead.get("source")))
+        lead_daily_stats.move(lead, {**lead, **update_data})
+    if changing:
+        await analytics_cache.invalidate(*{lead.get("campaign_id") for lead in changing})
+    
+    for lead in changing:
+        lead_scorer.request(lead["_id"])
+    
+    return {
+        "message": f"{len(changing)} leads moved to {target_status}",
+        "updated": len(changing),
+        "lead_ids": [str(lead["_id"]) for lead in changing],
+        "unchanged": unchanged,
+        "not_found": not_found,
+        "invalid_ids": invalid_ids
+    }
 
-async def update_campaign_qualified_count(db, campaign_id: str, source: str):
-    """Increment campaign qualified count"""
-    try:
-        from datetime import date
-        today = date.today()
-        
-        await db.campaigns.update_one(
-            {"_id": ObjectId(campaign_id)},
-            {"$inc": {"qualified_leads": 1}}
+@router.post("/import", status_code=status.HTTP_202_ACCEPTED)
+async def import_leads_file(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    campaign_id: Optional[str] = Form(None),
+    assigned_to: Optional[str] = Form(None),
+    authorization: Optional[str] = Header(None)
+):
+    """Import leads from a CSV or XLSX file as a background job"""
+    current_user = get_current_user_from_header(authorization)
+    
+    if current_user.get("role") not in ["admin", "manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and managers can bulk import leads"
         )
-        
-        # Update daily target
-        if source == "data_entry":
-            await db.campaigns.update_one(
-                {"_id": ObjectId(campaign_id), "daily_targets.date": today},
-                {"$inc": {"daily_targets.$.qualified_data": 1}}
-            )
-        elif source == "calling":
-            await db.campaigns.update_one(
-                {"_id": ObjectId(campaign_id), "daily_targets.date": today},
-                {"$inc": {"daily_targets.$.qualified_calling": 1}}
-            )
-    except:
-        pass
+    
+    extension = file_extension(file.filename)
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only .csv and .xlsx files are supported"
+        )
+    path = await save_upload(file)
+    defaults = {"campaign_id": campaign_id, "assigned_to": assigned_to}
+    job_id = await create_job(file.filename, current_user.get("sub"), defaults)
+    background_tasks.add_task(run_import_job, job_id, path, current_user.get("sub"), defaults)
+    
+    return {
+        "message": "Lead import started",
+        "job_id": job_id,
+        "status": "queued"
+    }
 
-async def update_campaign_disqualified_count(db, campaign_id: str, source: str):
-    """Increment campaign disqualified count"""
+@router.get("/import/{job_id}")
+async def get_import_job(
+    job_id: str,
+    authorization: Optional[str] = Header(None)
+):
+    """Get lead import job progress"""
+    current_user = get_current_user_from_header(authorization)
+    
+    db = get_db()
+    
     try:
-        from datetime import date
-        today = date.today()
-        
-        await db.campaigns.update_one(
-            {"_id": ObjectId(campaign_id)},
-            {"$inc": {"disqualified_leads": 1}}
-        )
-        
-        # Update daily target
-        if source == "data_entry":
-            await db.campaigns.update_one(
-                {"_id": ObjectId(campaign_id), "daily_targets.date": today},
-                {"$inc": {"daily_targets.$.disqualified_data": 1}}
-            )
-        elif source == "calling":
-            await db.campaigns.update_one(
-                {"_id": ObjectId(campaign_id), "daily_targets.date": today},
-                {"$inc": {"daily_targets.$.disqualified_calling": 1}}
-            )
+        job = await db.lead_import_jobs.find_one({"_id": ObjectId(job_id)})
     except:
-        pass
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid job ID"
+        )
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    
+    if current_user.get("role") != "admin" and job.get("created_by") != current_user.get("sub"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    job["_id"] = str(job["_id"])
+    return job
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, HTTPException, status, Header
+from typing import Optional
+from app.security import get_current_user_from_header, token_cache, password_pool_stats
+from app.revocation import revocation_list
+from app.user_directory import user_directory
+from app.indexes import index_report
+from app.monitoring import command_listener, pool_listener
+from app.write_behind import write_behind
+from app.lead_scoring import lead_scorer
+from app.campaign_counters import campaign_counters
+from app.lead_daily_stats import lead_daily_stats
+from app.analytics_cache import analytics_cache
+from app.database import get_db
+from app.config import settings
+
+router = APIRouter()
+
+
+def require_admin(authorization: Optional[str]):
+    """Metrics are only visible to admins"""
+    current_user = get_current_user_from_header(authorization)
+    if current_user.get("role") != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view metrics"
+        )
+    return current_user
+
+
+@router.get("")
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """In-process performance counters for this worker"""
+    require_admin(authorization)
+
+    return {
+        "auth_token_cache": token_cache.stats(),
+        "password_hashing": password_pool_stats(),
+        "token_revocation": revocation_list.stats(),
+        "user_directory_cache": user_directory.stats(),
+        "mongo_pool": pool_listener.stats(),
+        "write_behind": write_behind.stats(),
+        "lead_scoring": lead_scorer.stats(),
+        "campaign_counters": campaign_counters.stats(),
+        "lead_daily_stats": lead_daily_stats.stats(),
+        "analytics_cache": await analytics_cache.stats()
+    }
+
+
+@router.get("/indexes")
+async def get_index_report(authorization: Optional[str] = Header(None)):
+    """Missing, extra and unused indexes per collection"""
+    require_admin(authorization)
+
+    return await index_report(get_db())
+
+
+@router.get("/db")
+async def get_db_metrics(authorization: Optional[str] = Header(None)):
+    """Per-endpoint DB round trips/time and recent slow commands with plan summaries"""
+    require_admin(authorization)
+
+    return {
+        "slow_query_ms": settings.SLOW_QUERY_MS,
+        "endpoints": command_listener.endpoint_report(),
+        "slow_queries": list(command_listener.slow_queries)
+    }
@@ -3,34 +3,30 @@ from typing import Literal
 import io
 import csv
 from datetime import datetime
-from bson import ObjectId
 
 # Import your database connection function
 from app.database import get_db
+from app.user_directory import user_directory
 
 router = APIRouter()
 
 async def get_tasks_from_db():
     """Fetch all tasks from MongoDB"""
-    db = get_db()
+    db = get_db("analytics")
     tasks_collection = db["tasks"]
-    users_collection = db["users"]
     
     tasks = await tasks_collection.find({"is_deleted": False}).to_list(length=1000)
     
+    # Resolve every assignee in one batch instead of one lookup per task
+    users = await user_directory.resolve(task.get('assigned_to') for task in tasks)
+    
     # Convert ObjectId to string and enrich with user names
     for task in tasks:
         task['_id'] = str(task['_id'])
         
-        # Attempt to get assigned user's full name if available
-        if task.get('assigned_to'):
-            try:
-                user = await users_collection.find_one({"_id": ObjectId(task['assigned_to'])})
-                if user:
-                    task['assigned_to'] = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
-            except Exception:
-                # Fail silently if error occurs
-                pass
+        user = users.get(str(task.get('assigned_to')))
+        if user:
+            task['assigned_to'] = user['name']
     
     return tasks
 
@@ -1,28 +1,14 @@
 from fastapi import APIRouter, HTTPException, status, Header
 from typing import List, Optional
 from app.models.task import TaskResponse, TaskCreate, TaskUpdate, TaskStatus, TaskPriority
-from app.security import verify_token, get_token_from_header
+from app.security import get_current_user_from_header
 from app.database import get_db
+from app.write_behind import write_behind
 from bson.objectid import ObjectId
 from datetime import datetime, timezone
 
 router = APIRouter()
 
-# ---------------------------------------------------------------
-# Helper: Extract user from JWT
-# ---------------------------------------------------------------
-
-def get_current_user_from_header(authorization: Optional[str] = Header(None)):
-    token = get_token_from_header(authorization)
-    if not token:
-        raise HTTPException(401, "Missing or invalid authorization header")
-
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(401, "Invalid token")
-
-    return payload
-
 # ---------------------------------------------------------------
 # Helper: Convert MongoDB ObjectId → str
 # ---------------------------------------------------------------
@@ -58,12 +44,12 @@ async def create_task(request: TaskCreate, authorization: Optional[str] = Header
     task_data["_id"] = result.inserted_id
 
     # Log activity
-    await db.activity_logs.insert_one({
+    await write_behind.enqueue_insert("activity_logs", {
         "user_id": current_user.get("sub"),
         "action": "create",
         "entity_type": "task",
         "entity_id": str(result.inserted_id),
-        "new_value": task_data,
+        "new_value": dict(task_data),
         "created_at": datetime.now(timezone.utc)
     })
 
@@ -155,7 +141,7 @@ async def update_task(task_id: str, request: TaskUpdate, authorization: Optional
     await db.tasks.update_one({"_id": oid}, {"$set": update_data})
 
     # Log activity
-    await db.activity_logs.insert_one({
+    await write_behind.enqueue_insert("activity_logs", {
         "user_id": current_user.get("sub"),
         "action": "update",
         "entity_type": "task",
@@ -191,7 +177,7 @@ async def delete_task(task_id: str, authorization: Optional[str] = Header(None))
     if result.matched_count == 0:
         raise HTTPException(404, "Task not found")
 
-    await db.activity_logs.insert_one({
+    await write_behind.enqueue_insert("activity_logs", {
         "user_id": current_user.get("sub"),
         "action": "delete",
         "entity_type": "task",
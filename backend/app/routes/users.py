@@ -1,10 +1,24 @@
 from fastapi import APIRouter, HTTPException, status, Header
 from typing import List, Optional
-from app.models.user import UserResponse, UserUpdate, UserRole
-from app.security import hash_password, verify_token, get_token_from_header
+from app.models.user import (
+    UserResponse,
+    UserUpdate,
+    UserRole,
+    UserCreate,
+    BulkUserResult,
+    BulkUserResponse
+)
+from app.security import hash_password_async, get_current_user_from_header
 from app.database import get_db
+from app.write_behind import write_behind
+from app.revocation import revocation_list
+from app.user_directory import user_directory
 from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timezone
+import asyncio
+
+MAX_BULK_USERS = 1000
 
 router = APIRouter()
 
@@ -25,26 +39,6 @@ def serialize_user(user: dict):
         
     return user
 
-# ----------------------------------------------------------
-# AUTH HELPERS (UNCHANGED)
-# ----------------------------------------------------------
-def get_current_user_from_header(authorization: Optional[str] = Header(None)):
-    """Extract and verify current user from Authorization header"""
-    token = get_token_from_header(authorization)
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing or invalid authorization header"
-        )
-    
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    return payload
-
 # ----------------------------------------------------------
 # GET PROFILE (UNCHANGED)
 # ----------------------------------------------------------
@@ -81,11 +75,12 @@ async def update_profile(
     update_data = request.dict(exclude_unset=True, exclude_none=True)
     
     if "password" in update_data:
-        update_data["hashed_password"] = hash_password(update_data.pop("password"))
+        update_data["hashed_password"] = await hash_password_async(update_data.pop("password"))
     
     update_data["updated_at"] = datetime.now(timezone.utc)
     
     await db.users.update_one({"_id": user_id}, {"$set": update_data})
+    user_directory.invalidate(user_id)
     user = await db.users.find_one({"_id": user_id})
     
     return UserResponse(**serialize_user(user))
@@ -115,6 +110,96 @@ async def list_users(
     # ✅ serialize_user now handles last_login formatting
     return [UserResponse(**serialize_user(user)) for user in users]
 
+# ----------------------------------------------------------
+# BULK CREATE USERS
+# ----------------------------------------------------------
+@router.post("/bulk", response_model=BulkUserResponse, status_code=status.HTTP_207_MULTI_STATUS)
+async def bulk_create_users(
+    users: List[UserCreate],
+    authorization: Optional[str] = Header(None)
+):
+    """Provision many users at once (admin/manager only)"""
+    current_user = get_current_user_from_header(authorization)
+    
+    if current_user.get("role") not in ["admin", "manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins/managers can create users"
+        )
+    
+    if len(users) > MAX_BULK_USERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_USERS} users can be created per request"
+        )
+    
+    if not users:
+        return BulkUserResponse(created=0, failed=0, results=[])
+    
+    db = get_db()
+    
+    # Hash in parallel across the password pool
+    hashed_passwords = await asyncio.gather(*(hash_password_async(u.password) for u in users))
+    
+    now = datetime.now(timezone.utc)
+    documents = [
+        {
+            "email": u.email,
+            "username": u.username,
+            "first_name": u.first_name,
+            "last_name": u.last_name,
+            "hashed_password": hashed,
+            "role": u.role.value,
+            "department": u.department,
+            "phone": u.phone,
+            "is_active": True,
+            "is_deleted": False,
+            "last_login": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        for u, hashed in zip(users, hashed_passwords)
+    ]
+    
+    # Unique indexes on email/username reject duplicates - no read-before-write
+    errors = {}
+    try:
+        await db.users.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            errors[write_error["index"]] = describe_write_error(write_error)
+    
+    results = []
+    for index, (u, document) in enumerate(zip(users, documents)):
+        if index in errors:
+            results.append(BulkUserResult(index=index, email=u.email, success=False, error=errors[index]))
+        else:
+            results.append(BulkUserResult(index=index, email=u.email, success=True, id=str(document["_id"])))
+    
+    created = len(users) - len(errors)
+    if created:
+        await write_behind.enqueue_insert("activity_logs", {
+            "user_id": current_user.get("sub"),
+            "action": "bulk_create",
+            "entity_type": "user",
+            "entity_id": "bulk",
+            "new_value": {"created": created, "failed": len(errors)},
+            "created_at": now
+        })
+    
+    return BulkUserResponse(created=created, failed=len(errors), results=results)
+
+def describe_write_error(write_error: dict) -> str:
+    """Turn an insert_many write error into a per-row message"""
+    if write_error.get("code") == 11000:
+        key_pattern = write_error.get("keyPattern") or {}
+        if "email" in key_pattern:
+            return "Email already registered"
+        if "username" in key_pattern:
+            return "Username already taken"
+        return "Duplicate user"
+    return write_error.get("errmsg", "Failed to create user")
+
 # ----------------------------------------------------------
 # UPDATE USER BY ID (UNCHANGED)
 # ----------------------------------------------------------
@@ -138,7 +223,7 @@ async def update_user(
     update_data = request.dict(exclude_unset=True, exclude_none=True)
     
     if "password" in update_data:
-        update_data["hashed_password"] = hash_password(update_data.pop("password"))
+        update_data["hashed_password"] = await hash_password_async(update_data.pop("password"))
     
     update_data["updated_at"] = datetime.now(timezone.utc)
     
@@ -159,6 +244,12 @@ async def update_user(
             detail="User not found"
         )
     
+    user_directory.invalidate(user_id)
+    
+    # Deactivated users lose their outstanding tokens immediately
+    if update_data.get("is_active") is False:
+        await revocation_list.revoke_user(user_id)
+    
     user = await db.users.find_one({"_id": ObjectId(user_id)})
     return UserResponse(**serialize_user(user))
 
@@ -221,6 +312,9 @@ async def delete_user(user_id: str, authorization: Optional[str] = Header(None))
             detail="User not found"
         )
     
+    user_directory.invalidate(user_id)
+    await revocation_list.revoke_user(user_id)
+    
     return {"message": "User deleted successfully"}
 
 # ----------------------------------------------------------
@@ -260,4 +354,9 @@ async def update_user_role(
             detail="User not found"
         )
     
+    user_directory.invalidate(user_id)
+    
+    # Outstanding tokens still carry the old role claim
+    await revocation_list.revoke_user(user_id)
+    
     return {"message": f"User role updated to {role.value}"}
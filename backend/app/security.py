@@ -1,12 +1,38 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict
+from typing import Optional, Dict, Callable, Any
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
-from fastapi import HTTPException, status
+from app.cache import TTLCache
+from app.revocation import revocation_list, max_token_lifetime
+from fastapi import HTTPException, status, Header
+import asyncio
+import hashlib
+import time
+import uuid
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# Worker pool that keeps bcrypt off the event loop
+_hash_executor: Optional[Executor] = None
+_hash_semaphore: Optional[asyncio.Semaphore] = None
+_hash_stats = {
+    "in_flight": 0,
+    "queue_depth": 0,
+    "max_queue_depth": 0,
+    "completed": 0,
+    "total_queue_wait_ms": 0.0,
+    "total_run_ms": 0.0
+}
+
+# Verified token payloads, keyed by token digest and expiring at the token's exp
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE)
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
@@ -16,18 +42,90 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def _get_hash_executor() -> Executor:
+    """Create the password hashing pool on first use"""
+    global _hash_executor, _hash_semaphore
+    if _hash_executor is None:
+        workers = max(1, settings.PASSWORD_HASH_WORKERS)
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        _hash_semaphore = asyncio.Semaphore(workers)
+    return _hash_executor
+
+async def _run_in_hash_pool(fn: Callable, *args: Any) -> Any:
+    """Run a bcrypt call in the pool, queueing when every worker is busy"""
+    executor = _get_hash_executor()
+    semaphore = _hash_semaphore
+    queued_at = time.perf_counter()
+    _hash_stats["queue_depth"] += 1
+    _hash_stats["max_queue_depth"] = max(_hash_stats["max_queue_depth"], _hash_stats["queue_depth"])
+    try:
+        await semaphore.acquire()
+    finally:
+        _hash_stats["queue_depth"] -= 1
+
+    started_at = time.perf_counter()
+    _hash_stats["in_flight"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    finally:
+        _hash_stats["in_flight"] -= 1
+        _hash_stats["completed"] += 1
+        _hash_stats["total_queue_wait_ms"] += (started_at - queued_at) * 1000
+        _hash_stats["total_run_ms"] += (time.perf_counter() - started_at) * 1000
+        semaphore.release()
+
+async def hash_password_async(password: str) -> str:
+    """Hash password using bcrypt without blocking the event loop"""
+    return await _run_in_hash_pool(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash without blocking the event loop"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+def password_pool_stats() -> Dict:
+    """Queue depth and timing counters of the password hashing pool"""
+    completed = _hash_stats["completed"]
+    return {
+        "executor": settings.PASSWORD_HASH_EXECUTOR,
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "in_flight": _hash_stats["in_flight"],
+        "queue_depth": _hash_stats["queue_depth"],
+        "max_queue_depth": _hash_stats["max_queue_depth"],
+        "completed": completed,
+        "avg_queue_wait_ms": round(_hash_stats["total_queue_wait_ms"] / completed, 2) if completed else 0.0,
+        "avg_run_ms": round(_hash_stats["total_run_ms"] / completed, 2) if completed else 0.0
+    }
+
+async def shutdown_password_pool():
+    """Stop the password hashing pool, waiting for running hashes off the event loop"""
+    global _hash_executor, _hash_semaphore
+    if _hash_executor is not None:
+        executor, _hash_executor, _hash_semaphore = _hash_executor, None, None
+        await asyncio.to_thread(executor.shutdown, wait=True)
+
 def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + min(expires_delta, max_token_lifetime())
     else:
-        expire = datetime.now(timezone.utc) + timedelta(
+        expire = now + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
+    to_encode.update({
+        "exp": expire,
+        "iat": now,
+        # iat is whole seconds; revocation compares this instead
+        "iat_ms": int(now.timestamp() * 1000),
+        "jti": uuid.uuid4().hex
+    })
     
     try:
         encoded_jwt = jwt.encode(
@@ -62,3 +160,38 @@ def get_token_from_header(authorization: Optional[str]) -> Optional[str]:
     if not authorization or not authorization.startswith("Bearer "):
         return None
     return authorization.replace("Bearer ", "")
+
+def verify_token_cached(token: str) -> Optional[Dict]:
+    """Verify JWT token, reusing the payload of a previously verified identical token"""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = verify_token(token)
+    if payload and payload.get("exp"):
+        token_cache.set(key, payload, ttl=payload["exp"] - time.time())
+    return payload
+
+def get_current_user_from_header(authorization: Optional[str] = Header(None)) -> Dict:
+    """Extract and verify current user from Authorization header"""
+    token = get_token_from_header(authorization)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing or invalid authorization header"
+        )
+    
+    payload = verify_token_cached(token)
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+    
+    if revocation_list.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    return payload
@@ -0,0 +1,56 @@
+from typing import Dict, Iterable
+from bson.objectid import ObjectId
+from app.cache import TTLCache
+from app.config import settings
+from app.database import get_db
+
+USER_DIRECTORY_PROJECTION = {"first_name": 1, "last_name": 1, "email": 1, "role": 1, "is_active": 1}
+
+
+class UserDirectory:
+    """Cached id -> {name, email, role, is_active} lookups for enriching other documents"""
+
+    def __init__(self):
+        self._cache = TTLCache(
+            maxsize=settings.USER_DIRECTORY_CACHE_SIZE,
+            default_ttl=settings.USER_DIRECTORY_TTL_SECONDS
+        )
+
+    @staticmethod
+    def _entry(user: dict) -> dict:
+        return {
+            "name": f"{user.get('first_name', '')} {user.get('last_name', '')}".strip(),
+            "email": user.get("email"),
+            "role": user.get("role"),
+            "is_active": user.get("is_active", True)
+        }
+
+    async def resolve(self, user_ids: Iterable) -> Dict[str, dict]:
+        """Resolve a batch of user ids, fetching every cache miss with one $in query"""
+        found = {}
+        missing = []
+        for user_id in {str(u) for u in user_ids if u}:
+            entry = self._cache.get(user_id)
+            if entry is not None:
+                found[user_id] = entry
+            elif ObjectId.is_valid(user_id):
+                missing.append(ObjectId(user_id))
+
+        if missing:
+            cursor = get_db().users.find({"_id": {"$in": missing}}, USER_DIRECTORY_PROJECTION)
+            async for user in cursor:
+                user_id = str(user["_id"])
+                found[user_id] = self._entry(user)
+                self._cache.set(user_id, found[user_id])
+
+        return found
+
+    def invalidate(self, user_id: str):
+        """Forget a user after a write in users.py"""
+        self._cache.pop(str(user_id))
+
+    def stats(self) -> Dict:
+        return self._cache.stats()
+
+
+user_directory = UserDirectory()
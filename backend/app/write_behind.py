@@ -0,0 +1,176 @@
+from typing import Optional, Dict, List, Tuple
+from collections import defaultdict
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.database import get_db
+import asyncio
+import time
+
+
+class WriteBehindQueue:
+    """Background batching writer for writes that must not sit on a request's critical path.
+
+    Queued inserts (audit events: activity_logs, lead_activities) and updates
+    are flushed every WRITE_BEHIND_FLUSH_MS or WRITE_BEHIND_BATCH_SIZE
+    operations, whichever comes first: inserts with one insert_many per
+    collection, updates with one ordered bulk_write per collection. The queue
+    holds at most WRITE_BEHIND_MAX_QUEUE operations; producers wait when it
+    is full.
+
+    WRITE_BEHIND_DURABILITY decides what enqueueing awaits:
+    "fire_and_forget" returns once the operation is queued, "await_flush"
+    returns once its batch is written (and raises if the write failed).
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.backpressure_waits = 0
+        self.total_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def start(self):
+        """Start the background consumer on the running event loop"""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=settings.WRITE_BEHIND_MAX_QUEUE)
+            self._task = asyncio.create_task(self._run())
+
+    async def enqueue_insert(self, collection: str, document: Dict, wait: Optional[bool] = None):
+        """Queue an insert into collection"""
+        await self._put(("insert", collection, document, None), wait)
+
+    async def enqueue_update(self, collection: str, filter: Dict, update: Dict, wait: Optional[bool] = None):
+        """Queue an update_one on collection"""
+        await self._put(("update", collection, filter, update), wait)
+
+    async def _put(self, op: tuple, wait: Optional[bool]):
+        if self._queue is None:
+            self.start()
+        if wait is None:
+            wait = settings.WRITE_BEHIND_DURABILITY == "await_flush"
+
+        future = asyncio.get_running_loop().create_future() if wait else None
+        if self._queue.full():
+            self.backpressure_waits += 1
+        await self._queue.put((op, future))
+        self.enqueued += 1
+        if future is not None:
+            await future
+
+    async def _next_batch(self) -> List[Tuple[tuple, Optional[asyncio.Future]]]:
+        """Wait for one operation, then collect more until the batch is full or the flush interval ends"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + settings.WRITE_BEHIND_FLUSH_MS / 1000
+        while len(batch) < settings.WRITE_BEHIND_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, kind: str, collection: str, items: List[Tuple[tuple, Optional[asyncio.Future]]]) -> List[Optional[Exception]]:
+        """Write one collection's share of a batch; returns the error (or None) per item"""
+        errors: List[Optional[Exception]] = [None] * len(items)
+        try:
+            if kind == "insert":
+                await get_db("audit")[collection].insert_many([op[2] for op, _ in items], ordered=False)
+            else:
+                await get_db()[collection].bulk_write([UpdateOne(op[2], op[3]) for op, _ in items], ordered=True)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if kind == "insert":
+                for write_error in write_errors:
+                    errors[write_error["index"]] = Exception(write_error.get("errmsg", "Write failed"))
+            else:
+                # Ordered: nothing after the first failed update was applied
+                first = write_errors[0]["index"] if write_errors else 0
+                for i in range(first, len(items)):
+                    errors[i] = e
+        except Exception as e:
+            errors = [e] * len(items)
+        return errors
+
+    async def _flush(self, batch: List[Tuple[tuple, Optional[asyncio.Future]]]):
+        started = time.perf_counter()
+        groups: Dict[Tuple[str, str], List] = defaultdict(list)
+        for op, future in batch:
+            groups[(op[0], op[1])].append((op, future))
+
+        results = await asyncio.gather(*(self._write(kind, collection, items) for (kind, collection), items in groups.items()))
+
+        for ((kind, collection), items), errors in zip(groups.items(), results):
+            failed = [e for e in errors if e is not None]
+            if failed:
+                print(f"⚠️ Write-behind {kind} on {collection} failed for {len(failed)}/{len(items)} operations: {str(failed[0])}")
+            self.written += len(items) - len(failed)
+            self.failed += len(failed)
+            for (_, future), error in zip(items, errors):
+                if future is not None and not future.done():
+                    if error is None:
+                        future.set_result(None)
+                    else:
+                        future.set_exception(error)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.batches += 1
+        self.total_flush_ms += elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                print(f"⚠️ Write-behind flush failed: {str(e)}")
+                for _, future in batch:
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def stop(self):
+        """Flush pending writes and stop the consumer"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._queue = None
+
+    def stats(self) -> Dict:
+        return {
+            "durability": settings.WRITE_BEHIND_DURABILITY,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": settings.WRITE_BEHIND_MAX_QUEUE,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": round((self.written + self.failed) / self.batches, 2) if self.batches else 0.0,
+            "avg_flush_ms": round(self.total_flush_ms / self.batches, 3) if self.batches else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "backpressure_waits": self.backpressure_waits
+        }
+
+
+write_behind = WriteBehindQueue()
@@ -0,0 +1,146 @@
+"""Lead analytics overview: five aggregations (old endpoint) vs one $facet.
+
+Seeds --leads leads spread over the last 90 days, builds the lead indexes,
+then times both ways of computing the overview for a 30 day range. Both
+results are compared so a speedup never hides a wrong answer. The $facet
+pipeline uses $dateTrunc, so the server must be MongoDB 5.0+.
+
+Needs a reachable MongoDB (MONGODB_URL). Writes into a scratch database
+named <DATABASE_NAME>_bench, which is dropped afterwards. Run from the
+backend directory:
+
+    python -m benchmarks.analytics_overview --leads 1000000 --runs 5
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.indexes import ensure_indexes
+from app.lead_overview import date_bounds, overview_match, overview_pipeline, legacy_trend
+
+STATUSES = ["new", "contacted", "qualified", "disqualified", "converted"]
+SOURCES = ["calling", "data_entry", "website", "referral", "event"]
+REASONS = ["not_interested", "wrong_number", "duplicate", "budget", None]
+
+
+async def seed(db, count: int):
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    batch = []
+    for i in range(count):
+        status = rng.choice(STATUSES)
+        batch.append({
+            "name": f"Lead {i}",
+            "status": status,
+            "source": rng.choice(SOURCES),
+            "disqualification_reason": rng.choice(REASONS) if status == "disqualified" else None,
+            "created_at": now - timedelta(seconds=rng.randrange(90 * 86400)),
+            "is_deleted": i % 50 == 0
+        })
+        if len(batch) == 10000:
+            await db.leads.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.leads.insert_many(batch, ordered=False)
+    await ensure_indexes(db)
+
+
+async def five_queries(db, start, end):
+    """The pre-$facet endpoint: four aggregations and a count_documents"""
+    match = overview_match(start, end)
+    status_breakdown = await db.leads.aggregate([
+        {"$match": match}, {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]).to_list(length=None)
+    source_breakdown = await db.leads.aggregate([
+        {"$match": match}, {"$group": {"_id": "$source", "count": {"$sum": 1}}}
+    ]).to_list(length=None)
+    disqualification_reasons = await db.leads.aggregate([
+        {"$match": {**match, "status": "disqualified"}},
+        {"$group": {"_id": "$disqualification_reason", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}}
+    ]).to_list(length=None)
+    daily_trend = await db.leads.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "year": {"$year": "$created_at"},
+                "month": {"$month": "$created_at"},
+                "day": {"$dayOfMonth": "$created_at"}
+            },
+            "count": {"$sum": 1}
+        }},
+        {"$sort": {"_id": 1}}
+    ]).to_list(length=None)
+    total = await db.leads.count_documents(match)
+    return total, status_breakdown, source_breakdown, disqualification_reasons, daily_trend
+
+
+async def facet(db, start, end):
+    zone = ZoneInfo("UTC")
+    result = (await db.leads.aggregate(overview_pipeline(overview_match(start, end), "day", "UTC")).to_list(length=1))[0]
+    total = result["total"][0]["count"] if result["total"] else 0
+    return (total, result["status_breakdown"], result["source_breakdown"],
+            result["disqualification_reasons"], legacy_trend(result["trend"], zone))
+
+
+def by_id(rows):
+    return sorted((str(row["_id"]), row["count"]) for row in rows)
+
+
+def normalized(result):
+    total, statuses, sources, reasons, trend = result
+    return total, by_id(statuses), by_id(sources), by_id(reasons), by_id(trend)
+
+
+async def timed(fn, db, start, end, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await fn(db, start, end)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, result
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=1000000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--days", type=int, default=30, help="overview range ending today")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[f"{settings.DATABASE_NAME}_bench"]
+
+    try:
+        await client.drop_database(db.name)
+        started = time.perf_counter()
+        await seed(db, args.leads)
+        print(f"seeded {args.leads} leads in {time.perf_counter() - started:.1f}s")
+
+        end_date = date.today()
+        start, end = date_bounds(end_date - timedelta(days=args.days), end_date, ZoneInfo("UTC"))
+
+        await five_queries(db, start, end)  # warm the cache for both
+        old_samples, old_result = await timed(five_queries, db, start, end, args.runs)
+        new_samples, new_result = await timed(facet, db, start, end, args.runs)
+
+        print(f"five queries  mean {statistics.mean(old_samples):8.1f}ms  min {min(old_samples):8.1f}ms")
+        print(f"$facet        mean {statistics.mean(new_samples):8.1f}ms  min {min(new_samples):8.1f}ms  "
+              f"({statistics.mean(old_samples) / statistics.mean(new_samples):.1f}x)")
+        print(f"results match: {normalized(old_result) == normalized(new_result)} "
+              f"({old_result[0]} leads in range)")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""Login latency under concurrent load: inline bcrypt vs the hashing pool.
+
+Simulates the password check of auth.login for a burst of concurrent logins
+while a cheap "other request" is served every few milliseconds, and reports
+p50/p99 for both. Run from the backend directory:
+
+    python -m benchmarks.bcrypt_login --logins 64
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.security import (
+    hash_password,
+    verify_password,
+    verify_password_async,
+    password_pool_stats,
+    shutdown_password_pool
+)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(mode: str, logins: int, hashed: str):
+    login_ms = []
+    other_ms = []
+    done = asyncio.Event()
+
+    async def login():
+        started = time.perf_counter()
+        await asyncio.sleep(0)  # stands in for users.find_one
+        if mode == "inline":
+            verify_password("Employee@123", hashed)
+        else:
+            await verify_password_async("Employee@123", hashed)
+        login_ms.append((time.perf_counter() - started) * 1000)
+
+    async def other_requests():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            other_ms.append((time.perf_counter() - started) * 1000 - 5)
+
+    background = asyncio.create_task(other_requests())
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await background
+
+    print(
+        f"{mode:>6}: {logins} logins in {elapsed:.2f}s | "
+        f"login p50={percentile(login_ms, 50):.0f}ms p99={percentile(login_ms, 99):.0f}ms | "
+        f"other requests p50={statistics.median(other_ms):.1f}ms p99={percentile(other_ms, 99):.1f}ms "
+        f"(n={len(other_ms)})"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+
+    hashed = hash_password("Employee@123")
+    await run("inline", args.logins, hashed)
+    await run("pool", args.logins, hashed)
+    print("pool stats:", password_pool_stats())
+    await shutdown_password_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
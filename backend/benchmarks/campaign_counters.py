@@ -0,0 +1,123 @@
+"""Campaign counter contention: per-call $inc vs the coalescing aggregator.
+
+Simulates a calling blitz: --concurrency workers qualify leads of one
+campaign in parallel. "direct" is the old helper (two update_one calls on
+the campaign document per qualify), "aggregated" merges the deltas in
+app.campaign_counters and flushes one $inc every CAMPAIGN_COUNTER_FLUSH_MS.
+Each qualify also does its lead find_one_and_update, as the endpoint does.
+
+Needs a reachable MongoDB (MONGODB_URL). Writes into a scratch database
+named <DATABASE_NAME>_bench, which is dropped afterwards. Run from the
+backend directory:
+
+    python -m benchmarks.campaign_counters --leads 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import app.database as database
+from app.config import settings
+from app.campaign_counters import CampaignCounterAggregator, status_change_inc, target_day
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def seed(db, count: int):
+    await db.campaigns.delete_many({})
+    await db.leads.delete_many({})
+    campaign_id = (await db.campaigns.insert_one({
+        "qualified_leads": 0,
+        "daily_targets": [{"date": target_day(), "qualified_calling": 0}]
+    })).inserted_id
+    await db.leads.insert_many([
+        {"campaign_id": str(campaign_id), "status": "contacted", "source": "calling", "is_deleted": False}
+        for _ in range(count)
+    ])
+    lead_ids = [doc["_id"] async for doc in db.leads.find({}, {"_id": 1})]
+    return campaign_id, lead_ids
+
+
+async def qualify(db, lead_oid):
+    return await db.leads.find_one_and_update(
+        {"_id": lead_oid},
+        {"$set": {"status": "qualified"}},
+        projection={"status": 1, "campaign_id": 1, "source": 1}
+    )
+
+
+async def run(db, lead_ids, concurrency, on_qualified):
+    queue = asyncio.Queue()
+    for lead_oid in lead_ids:
+        queue.put_nowait(lead_oid)
+    samples = []
+
+    async def worker():
+        while not queue.empty():
+            lead_oid = queue.get_nowait()
+            started = time.perf_counter()
+            lead = await qualify(db, lead_oid)
+            await on_qualified(lead)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, samples
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL, maxPoolSize=args.concurrency)
+    db = client[f"{settings.DATABASE_NAME}_bench"]
+    # The aggregator writes through app.database.get_db()
+    database.db = database.handles["default"] = db
+
+    try:
+        # Direct: the old update_campaign_qualified_count (two updates per qualify)
+        campaign_id, lead_ids = await seed(db, args.leads)
+        today = target_day()
+
+        async def direct(lead):
+            await db.campaigns.update_one({"_id": campaign_id}, {"$inc": {"qualified_leads": 1}})
+            await db.campaigns.update_one(
+                {"_id": campaign_id, "daily_targets.date": today},
+                {"$inc": {"daily_targets.$.qualified_calling": 1}}
+            )
+
+        elapsed, samples = await run(db, lead_ids, args.concurrency, direct)
+        campaign = await db.campaigns.find_one({"_id": campaign_id})
+        print(f"direct      {args.leads / elapsed:8.0f} qualifies/s  p50 {percentile(samples, 50):6.2f}ms  "
+              f"p99 {percentile(samples, 99):6.2f}ms  campaign writes {2 * args.leads}  "
+              f"qualified_leads={campaign['qualified_leads']}")
+
+        # Aggregated
+        campaign_id, lead_ids = await seed(db, args.leads)
+        aggregator = CampaignCounterAggregator()
+        aggregator.start()
+
+        async def aggregated(lead):
+            aggregator.add(lead["campaign_id"], status_change_inc(lead["status"], "qualified", lead["source"]))
+
+        elapsed, samples = await run(db, lead_ids, args.concurrency, aggregated)
+        await aggregator.stop()
+        campaign = await db.campaigns.find_one({"_id": campaign_id})
+        print(f"aggregated  {args.leads / elapsed:8.0f} qualifies/s  p50 {percentile(samples, 50):6.2f}ms  "
+              f"p99 {percentile(samples, 99):6.2f}ms  campaign writes {aggregator.updates_sent}  "
+              f"qualified_leads={campaign['qualified_leads']} "
+              f"(flush every {settings.CAMPAIGN_COUNTER_FLUSH_MS}ms)")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""Single lead creation latency per LEAD_WRITE_MODE.
+
+Each iteration creates one assigned lead in a campaign: the lead insert,
+its CREATED activity and follow-up task, campaign counters and the daily
+rollup. Transaction mode writes all of them inside the transaction. The
+other modes hand the counters and rollup to their in-process aggregators
+(app.campaign_counters, app.lead_daily_stats), which run during the
+benchmark as they do in the app; each mode's wall time includes a final
+flush of both, so no mode skips writes the others pay for. Transaction
+mode needs a replica set (otherwise insert_lead falls back to concurrent,
+reported as such). Needs a reachable MongoDB (MONGODB_URL); writes into a scratch
+database named <DATABASE_NAME>_bench, which is dropped afterwards. Run from
+the backend directory:
+
+    python -m benchmarks.lead_create --iterations 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from bson.objectid import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import app.database as database
+from app.config import settings
+from app.campaign_counters import campaign_counters
+from app.lead_daily_stats import lead_daily_stats
+from app.models.lead import LeadCreate
+from app.lead_documents import build_lead_document
+from app.lead_writes import LEAD_WRITE_MODES, insert_lead, supports_transactions
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_mode(db, mode: str, iterations: int, campaign_id: str, created_by: str):
+    samples = []
+    for i in range(iterations):
+        lead = LeadCreate(
+            name=f"Lead {mode} {i}",
+            email=f"{mode}{i}@example.com",
+            phone=f"+91-97{i:08d}",
+            source="calling",
+            campaign_id=campaign_id,
+            assigned_to=str(ObjectId())
+        )
+        doc = build_lead_document(lead, created_by)
+        started = time.perf_counter()
+        await insert_lead(db, doc, created_by, mode=mode)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def flush_aggregators():
+    await campaign_counters.flush()
+    await lead_daily_stats.flush()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--modes", nargs="+", default=list(LEAD_WRITE_MODES), choices=LEAD_WRITE_MODES)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[f"{settings.DATABASE_NAME}_bench"]
+    # The aggregators write through app.database.get_db()
+    database.db = database.handles["default"] = db
+    created_by = str(ObjectId())
+
+    try:
+        await client.drop_database(db.name)
+        await client.admin.command("ping")
+        campaign_id = str((await db.campaigns.insert_one({"total_leads": 0})).inserted_id)
+        # Collections must exist before the first transaction writes to them
+        for name in ("leads", "lead_activities", "tasks", "lead_daily_stats"):
+            await db.create_collection(name)
+        campaign_counters.start()
+        lead_daily_stats.start()
+
+        for mode in args.modes:
+            label = mode
+            if mode == "transaction" and not supports_transactions(db):
+                label = "transaction (no replica set, ran concurrent)"
+            await run_mode(db, mode, 20, campaign_id, created_by)  # warm up the pool
+            await flush_aggregators()
+            started = time.perf_counter()
+            samples = await run_mode(db, mode, args.iterations, campaign_id, created_by)
+            await flush_aggregators()
+            wall = time.perf_counter() - started
+            print(f"{label:<46} mean {statistics.mean(samples):6.2f}ms  "
+                  f"p50 {percentile(samples, 50):6.2f}ms  p99 {percentile(samples, 99):6.2f}ms  "
+                  f"wall incl. counter/rollup flush {wall:6.2f}s")
+    finally:
+        await campaign_counters.stop()
+        await lead_daily_stats.stop()
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
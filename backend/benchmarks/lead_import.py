@@ -0,0 +1,83 @@
+"""Bulk lead import: per-row inserts (old bulk_import_leads loop) vs batched import.
+
+Needs a reachable MongoDB (MONGODB_URL). Writes into a scratch database
+named <DATABASE_NAME>_bench, which is dropped afterwards. Run from the
+backend directory:
+
+    python -m benchmarks.lead_import --sizes 1000 10000 100000
+"""
+import argparse
+import asyncio
+import time
+
+from bson.objectid import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.models.lead import LeadCreate
+from app.lead_documents import build_lead_document
+from app.lead_import import import_leads
+
+
+def make_leads(count: int, campaign_ids):
+    return [
+        LeadCreate(
+            name=f"Lead {i}",
+            email=f"lead{i}@example.com",
+            phone=f"+91-98{i:08d}",
+            company=f"Company {i % 500}",
+            source="calling" if i % 2 else "data_entry",
+            campaign_id=campaign_ids[i % len(campaign_ids)],
+            assigned_to=str(ObjectId()) if i % 3 == 0 else None
+        )
+        for i in range(count)
+    ]
+
+
+async def per_row(db, leads, created_by):
+    """The pre-batching loop: insert_one + campaign $inc per lead"""
+    for lead in leads:
+        doc = build_lead_document(lead, created_by)
+        await db.leads.insert_one(doc)
+        if doc.get("campaign_id"):
+            await db.campaigns.update_one({"_id": ObjectId(doc["campaign_id"])}, {"$inc": {"total_leads": 1}})
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--skip-per-row-above", type=int, default=10000,
+                        help="per-row mode is skipped for larger sizes (it takes minutes)")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[f"{settings.DATABASE_NAME}_bench"]
+    created_by = str(ObjectId())
+
+    try:
+        for size in args.sizes:
+            await client.drop_database(db.name)
+            campaign_ids = [str((await db.campaigns.insert_one({"total_leads": 0})).inserted_id) for _ in range(5)]
+            leads = make_leads(size, campaign_ids)
+
+            if size <= args.skip_per_row_above:
+                started = time.perf_counter()
+                await per_row(db, leads, created_by)
+                print(f"{size:>7} rows  per-row: {time.perf_counter() - started:7.2f}s")
+                await client.drop_database(db.name)
+                campaign_ids = [str((await db.campaigns.insert_one({"total_leads": 0})).inserted_id) for _ in range(5)]
+                leads = make_leads(size, campaign_ids)
+
+            started = time.perf_counter()
+            result = await import_leads(db, leads, created_by)
+            elapsed = time.perf_counter() - started
+            print(f"{size:>7} rows  batched: {elapsed:7.2f}s "
+                  f"({len(result['inserted_ids'])} inserted, {len(result['errors'])} errors, "
+                  f"chunk={settings.LEAD_IMPORT_CHUNK_SIZE}, incl. activities and follow-up tasks)")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,7 +1,8 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import os
+import time
 from dotenv import load_dotenv
 from app.routes import leads, campaigns, lead_analytics
 
@@ -11,7 +12,15 @@ load_dotenv()
 
 # Import database and routes
 from app.database import connect_to_mongo, close_mongo_connection
-from app.routes import auth, users, tasks, comments, notifications, activity_logs, reports
+from app.security import shutdown_password_pool
+from app.write_behind import write_behind
+from app.revocation import revocation_list
+from app.lead_scoring import lead_scorer
+from app.campaign_counters import campaign_counters
+from app.lead_daily_stats import lead_daily_stats
+from app.analytics_cache import analytics_cache
+from app.monitoring import command_listener, current_request_stats, RequestDBStats
+from app.routes import auth, users, tasks, comments, notifications, activity_logs, reports, metrics
 
 
 # Lifespan context manager
@@ -21,11 +30,23 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting application...")
     await connect_to_mongo()
     print("✅ Connected to MongoDB")
+    write_behind.start()
+    await revocation_list.start()
+    lead_scorer.start()
+    campaign_counters.start()
+    lead_daily_stats.start()
     yield
     # Shutdown
     print("🛑 Shutting down application...")
+    await revocation_list.stop()
+    await write_behind.stop()
+    await lead_scorer.stop()
+    await campaign_counters.stop()
+    await lead_daily_stats.stop()
+    await analytics_cache.close()
     await close_mongo_connection()
     print("✅ Disconnected from MongoDB")
+    await shutdown_password_pool()
 
 
 # Initialize FastAPI app
@@ -47,9 +68,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
+# Per-request DB round-trip accounting
+@app.middleware("http")
+async def track_db_usage(request: Request, call_next):
+    stats = RequestDBStats(f"{request.method} {request.url.path}")
+    token = current_request_stats.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_stats.reset(token)
+    
+    # Group by route template so /api/leads/{lead_id} is one endpoint
+    route = request.scope.get("route")
+    if route is not None:
+        stats.endpoint = f"{request.method} {route.path}"
+    command_listener.record_request(stats, (time.perf_counter() - started) * 1000)
+    
+    response.headers["X-DB-Round-Trips"] = str(stats.round_trips)
+    response.headers["X-DB-Time-Ms"] = f"{stats.db_time_ms:.1f}"
+    return response
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
@@ -61,6 +105,7 @@ app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
 app.include_router(leads.router, prefix="/api/leads", tags=["Leads"])
 app.include_router(campaigns.router, prefix="/api/campaigns", tags=["Campaigns"])
 app.include_router(lead_analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
 
 # Root endpoint
 @app.get("/")